@@ -33,7 +33,8 @@ async function apiRequest(endpoint, options = {}) {
 
     const response = await fetch(`${BASE_URL}${endpoint}`, {
         ...options,
-        headers
+        headers,
+        credentials: 'include'
     });
 
     if (response.status === 401) {
@@ -51,7 +52,8 @@ async function login(username, password) {
 
     const response = await fetch(`${BASE_URL}/api/auth/login`, {
         method: 'POST',
-        body: formData
+        body: formData,
+        credentials: 'include'
     });
 
     if (response.ok) {
@@ -91,6 +93,7 @@ async function getProducts(filters = {}) {
     const params = new URLSearchParams();
     if (filters.category_id) params.append('category_id', filters.category_id);
     if (filters.material) params.append('material', filters.material);
+    if (filters.karat) params.append('karat', filters.karat);
     if (filters.min_price) params.append('min_price', filters.min_price);
     if (filters.max_price) params.append('max_price', filters.max_price);
     
@@ -109,15 +112,26 @@ async function getCategories() {
 }
 
 async function getCart() {
-    if (!isLoggedIn()) return null;
-    const response = await apiRequest('/api/cart/');
+    const response = await apiRequest(isLoggedIn() ? '/api/cart/' : '/api/cart/guest');
+    return response ? response.json() : null;
+}
+
+async function getCartSummary() {
+    const response = await apiRequest(isLoggedIn() ? '/api/cart/summary' : '/api/cart/guest');
+    return response ? response.json() : null;
+}
+
+async function updateGuestCart(operations) {
+    const response = await apiRequest('/api/cart/guest', {
+        method: 'PATCH',
+        body: JSON.stringify({ operations })
+    });
     return response ? response.json() : null;
 }
 
 async function addToCart(productId, quantity = 1) {
     if (!isLoggedIn()) {
-        window.location.href = "login.html";
-        return null;
+        return updateGuestCart([{ op: 'add', product_id: productId, quantity }]);
     }
     const response = await apiRequest('/api/cart/items', {
         method: 'POST',
@@ -126,6 +140,14 @@ async function addToCart(productId, quantity = 1) {
     return response ? response.json() : null;
 }
 
+async function updateCart(operations) {
+    const response = await apiRequest('/api/cart/', {
+        method: 'PATCH',
+        body: JSON.stringify({ operations })
+    });
+    return response ? response.json() : null;
+}
+
 async function updateCartItem(itemId, quantity) {
     const response = await apiRequest(`/api/cart/items/${itemId}`, {
         method: 'PUT',
@@ -154,12 +176,44 @@ async function getOrders() {
     return response ? response.json() : [];
 }
 
-async function createOrder(orderData) {
+const CHECKOUT_KEY_STORAGE = "checkout_idempotency_key";
+
+function generateIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    if (window.crypto && crypto.getRandomValues) {
+        const bytes = crypto.getRandomValues(new Uint8Array(16));
+        return Array.from(bytes, byte => byte.toString(16).padStart(2, '0')).join('');
+    }
+    return `${Date.now().toString(16)}-${Math.random().toString(16).slice(2)}${Math.random().toString(16).slice(2)}`;
+}
+
+function getCheckoutKey() {
+    let key = sessionStorage.getItem(CHECKOUT_KEY_STORAGE);
+    if (!key) {
+        key = generateIdempotencyKey();
+        sessionStorage.setItem(CHECKOUT_KEY_STORAGE, key);
+    }
+    return key;
+}
+
+function resetCheckoutKey() {
+    sessionStorage.removeItem(CHECKOUT_KEY_STORAGE);
+}
+
+async function createOrder(orderData, idempotencyKey = getCheckoutKey()) {
     const response = await apiRequest('/api/orders/', {
         method: 'POST',
+        headers: { 'Idempotency-Key': idempotencyKey },
         body: JSON.stringify(orderData)
     });
-    return response ? response.json() : null;
+    if (!response) return null;
+    // Keep the key after 409s, 5xx and network errors so a retry is deduplicated.
+    if (response.ok || (response.status >= 400 && response.status < 500 && response.status !== 409)) {
+        resetCheckoutKey();
+    }
+    return response.json();
 }
 
 async function generateAIDesign(designData) {
@@ -230,6 +284,7 @@ function updateNavUI() {
                 <a href="profile.html" title="Profile"><i class="fas fa-user"></i></a>
                 <a href="#" onclick="logout(); return false;" title="Logout"><i class="fas fa-sign-out-alt"></i></a>
             `;
+            updateCartCount();
         } else {
             navIcons.innerHTML = `
                 <a href="login.html" title="Login"><i class="fas fa-sign-in-alt"></i></a>
@@ -239,6 +294,13 @@ function updateNavUI() {
     }
 }
 
+async function updateCartCount() {
+    const badge = document.getElementById('cart-count');
+    if (!badge) return;
+    const summary = await getCartSummary();
+    badge.textContent = summary && summary.item_count ? summary.item_count : '';
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     updateNavUI();
 });
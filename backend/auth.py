@@ -1,37 +1,101 @@
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_async_db
 from models.models import User
-from schemas.user import TokenData
+from schemas.user import TokenData, Principal, UserResponse
+from cache import principal_cache, principal_key
+from revocation import revocation_list
 from config import settings
+from passwords import pwd_context, password_pool, hash_password, verify_and_update
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hash_password(password)
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+async def get_password_hash_async(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _encode_token(data: dict, token_type: str, expire: datetime) -> str:
     to_encode = data.copy()
+    to_encode.update({"exp": expire, "type": token_type, "jti": uuid.uuid4().hex})
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    return _encode_token(data, ACCESS_TOKEN_TYPE, expire)
+
+def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    return _encode_token(data, REFRESH_TOKEN_TYPE, expire)
+
+def issue_tokens(user_id: int, username: str) -> dict:
+    claims = {"sub": username, "uid": user_id}
+    return {
+        "access_token": create_access_token(claims),
+        "refresh_token": create_refresh_token(claims),
+        "token_type": "bearer"
+    }
+
+def decode_token(token: str, token_type: str = ACCESS_TOKEN_TYPE) -> dict:
+    credentials_exception = _credentials_exception()
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    if payload.get("sub") is None or payload.get("type", ACCESS_TOKEN_TYPE) != token_type:
+        raise credentials_exception
+    jti = payload.get("jti")
+    if jti is not None and revocation_list.is_revoked(jti):
+        raise credentials_exception
+    if jti is None and token_type == REFRESH_TOKEN_TYPE:
+        raise credentials_exception
+    return payload
+
+async def revoke_token(db: AsyncSession, payload: dict) -> bool:
+    if payload.get("jti") is None:
+        return False
+    return await revocation_list.revoke(db, payload["jti"], datetime.utcfromtimestamp(payload["exp"]))
+
+async def decode_refresh_token(db: AsyncSession, token: str) -> dict:
+    payload = decode_token(token, REFRESH_TOKEN_TYPE)
+    if await revocation_list.is_revoked_async(db, payload["jti"]):
+        raise _credentials_exception()
+    return payload
 
 def get_user(db: Session, username: str) -> Optional[User]:
     return db.query(User).filter(User.username == username).first()
 
+async def get_user_async(db: AsyncSession, username: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     user = get_user(db, username)
     if not user:
@@ -40,24 +104,51 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
         return None
     return user
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    user = get_user(db, username=token_data.username)
+async def authenticate_user_async(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    user = await get_user_async(db, username)
+    if not user:
+        return None
+    db.expunge(user)
+    await db.rollback()
+    verified, new_hash = await password_pool.run(verify_and_update, password, user.password)
+    if not verified:
+        return None
+    if new_hash:
+        await db.execute(update(User).where(User.id == user.id).values(password=new_hash))
+        await db.commit()
+        user.password = new_hash
+    return user
+
+async def get_current_principal(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    credentials_exception = _credentials_exception()
+    payload = decode_token(token, ACCESS_TOKEN_TYPE)
+    token_data = TokenData(username=payload["sub"], user_id=payload.get("uid"))
+    if token_data.user_id is not None:
+        return Principal(id=token_data.user_id, username=token_data.username)
+    user = await get_user_async(db, username=token_data.username)
     if user is None:
         raise credentials_exception
+    return Principal(id=user.id, username=user.username)
+
+async def get_current_active_user(principal: Principal = Depends(get_current_principal)) -> Principal:
+    return principal
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserResponse:
+    async def load():
+        user = await db.get(User, principal.id)
+        return UserResponse.model_validate(user) if user else None
+    
+    user = await principal_cache.get_or_load_async(principal_key(principal.id), load)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
-    return current_user
+def invalidate_principal(user_id: int) -> None:
+    principal_cache.invalidate(principal_key(user_id))
@@ -0,0 +1,56 @@
+"""Compare catalog listing throughput on the async path against the old sync path.
+
+    python benchmarks/bench_async_vs_sync.py [--concurrency 32] [--duration 10]
+
+Both endpoints load the same page with the same loader options. The sync
+variant is mounted by this script only and runs in Starlette's threadpool,
+as every router did before the async port.
+"""
+import argparse
+import asyncio
+from harness import configure, hammer, seed_products, start_server, summarize
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    configure()
+
+    from typing import List
+    from fastapi import Depends
+    from sqlalchemy.orm import Session
+    from database import get_read_db
+    from models.loaders import PRODUCT_LOAD_OPTIONS
+    from models.models import Product
+    from schemas import ProductResponse
+    import main as app_module
+
+    def sync_products(limit: int = 100, db: Session = Depends(get_read_db)):
+        return db.query(Product).options(*PRODUCT_LOAD_OPTIONS).order_by(Product.id).limit(limit).all()
+
+    app_module.app.add_api_route("/bench/sync-products", sync_products, response_model=List[ProductResponse])
+    seed_products(args.products)
+    server, thread = start_server(app_module.app, args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    async def run(path: str):
+        async def request(client):
+            return await client.get(path)
+        return await hammer(base_url, request, args.concurrency, args.duration)
+
+    try:
+        results = [
+            summarize("sync (threadpool)", *asyncio.run(run(f"/bench/sync-products?limit={args.limit}")), args.duration),
+            summarize("async (AsyncSession)", *asyncio.run(run(f"/api/products/?limit={args.limit}")), args.duration),
+        ]
+        print(f"async/sync throughput ratio: {results[1]['rps'] / max(results[0]['rps'], 1e-9):.2f}x")
+    finally:
+        server.should_exit = True
+        thread.join()
+
+if __name__ == "__main__":
+    main()
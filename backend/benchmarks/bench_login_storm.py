@@ -0,0 +1,76 @@
+"""Measure catalog latency on its own and again during a login storm.
+
+    python benchmarks/bench_login_storm.py [--catalog-concurrency 16] [--login-concurrency 64]
+
+Logins use the configured BCRYPT_ROUNDS (12 by default), so each verification
+costs real CPU on the password pool. Logins past PASSWORD_HASH_MAX_PENDING are
+expected to come back as 429; the storm honours Retry-After like a real client
+unless --no-retry-after is given.
+"""
+import argparse
+import asyncio
+from harness import configure, hammer, seed_products, start_server, summarize
+
+PASSWORD = "storm-password"
+
+def seed_user() -> str:
+    from database import SessionLocal
+    from models.models import User
+    from passwords import hash_password
+
+    db = SessionLocal()
+    try:
+        db.add(User(username="storm", email="storm@example.com", password=hash_password(PASSWORD)))
+        db.commit()
+    finally:
+        db.close()
+    return "storm"
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--catalog-concurrency", type=int, default=16)
+    parser.add_argument("--login-concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--no-retry-after", dest="honor_retry_after", action="store_false",
+                        help="retry rejected logins immediately instead of honouring Retry-After")
+    args = parser.parse_args()
+    configure()
+
+    import main as app_module
+
+    seed_products(200)
+    username = seed_user()
+    server, thread = start_server(app_module.app, args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    async def catalog(client):
+        return await client.get("/api/products/?limit=20")
+
+    async def login(client):
+        response = await client.post("/api/auth/login", data={"username": username, "password": PASSWORD})
+        if response.status_code == 429 and args.honor_retry_after:
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+        return response
+
+    async def storm():
+        return await asyncio.gather(
+            hammer(base_url, catalog, args.catalog_concurrency, args.duration),
+            hammer(base_url, login, args.login_concurrency, args.duration),
+        )
+
+    try:
+        quiet = summarize(
+            "catalog, no logins", *asyncio.run(hammer(base_url, catalog, args.catalog_concurrency, args.duration)),
+            args.duration
+        )
+        (catalog_result, login_result) = asyncio.run(storm())
+        loaded = summarize("catalog, login storm", *catalog_result, args.duration)
+        summarize("logins", *login_result, args.duration)
+        print(f"catalog p99 change under storm: {loaded['p99_ms'] / max(quiet['p99_ms'], 1e-9):.2f}x")
+    finally:
+        server.should_exit = True
+        thread.join()
+
+if __name__ == "__main__":
+    main()
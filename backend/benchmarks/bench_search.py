@@ -0,0 +1,112 @@
+"""Measure product search latency over a large generated catalog.
+
+    python benchmarks/bench_search.py [--products 100000] [--iterations 200] [--duration 10]
+
+The first section times ProductSearchIndex.search in-process for exact,
+prefix and one-typo queries, which is the per-query cost the endpoint adds.
+The second drives GET /api/products/search under uvicorn, so it also pays
+for loading and serialising the matched rows.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from harness import configure, hammer, start_server, summarize
+
+STONES = ["sapphire", "diamond", "emerald", "ruby", "opal", "pearl", "topaz", "garnet", "amethyst", "onyx"]
+STYLES = ["halo", "solitaire", "eternity", "vintage", "cluster", "bezel", "pave", "cathedral", "tension", "bypass"]
+PIECES = ["ring", "pendant", "bracelet", "earrings", "necklace", "brooch", "anklet", "cuff", "choker", "band"]
+MATERIALS = ["Yellow Gold", "White Gold", "Rose Gold", "Platinum", "Silver", "Titanium"]
+CATEGORIES = ["Rings", "Necklaces", "Bracelets", "Earrings", "Bridal", "Vintage"]
+
+QUERIES = {
+    "exact": ["sapphire ring", "vintage pendant", "platinum band", "emerald"],
+    "prefix": ["sapph", "solit", "eterni ring", "amethy"],
+    "typo": ["saphire", "diamnod ring", "emerlad", "braclet"],
+}
+
+def seed_catalog(count: int) -> None:
+    from sqlalchemy import insert
+    from database import SessionLocal
+    from models.models import Category, Jeweler, Product, product_categories
+
+    rng = random.Random(42)
+    db = SessionLocal()
+    try:
+        jeweler = Jeweler(name="Bench", shop_name="Bench", email="bench@example.com")
+        categories = [Category(name=name) for name in CATEGORIES]
+        db.add_all([jeweler, *categories])
+        db.flush()
+        rows, links = [], []
+        for index in range(1, count + 1):
+            stone, style, piece = rng.choice(STONES), rng.choice(STYLES), rng.choice(PIECES)
+            rows.append({
+                "id": index,
+                "name": f"{stone.title()} {style} {piece}",
+                "description": f"A {style} {piece} set with {rng.choice(STONES)} and {rng.choice(STONES)} accents",
+                "material": rng.choice(MATERIALS),
+                "karat": rng.choice(["14K", "18K", "22K", "925"]),
+                "price": rng.randint(100, 20000),
+                "stock_quantity": 10,
+                "jeweler_id": jeweler.id
+            })
+            links.append({"product_id": index, "category_id": rng.choice(categories).id})
+        db.execute(insert(Product), rows)
+        db.execute(insert(product_categories), links)
+        db.commit()
+    finally:
+        db.close()
+
+def time_index(iterations: int) -> None:
+    from search import product_search_index
+
+    started = time.perf_counter()
+    product_search_index.ensure_built()
+    print(f"index build: {time.perf_counter() - started:.1f} s, {len(product_search_index)} products")
+    for kind, queries in QUERIES.items():
+        timings = []
+        for _ in range(iterations):
+            for query in queries:
+                started = time.perf_counter()
+                product_search_index.search(query, 20)
+                timings.append(time.perf_counter() - started)
+        timings.sort()
+        print(
+            f"{'index ' + kind:<28} {len(timings):>7} q    "
+            f"p50 {statistics.median(timings) * 1000:>7.2f} ms  "
+            f"p99 {timings[int(len(timings) * 0.99)] * 1000:>7.2f} ms"
+        )
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+    configure()
+
+    import main as app_module
+
+    seed_catalog(args.products)
+    time_index(args.iterations)
+    server, thread = start_server(app_module.app, args.port)
+    queries = [query for group in QUERIES.values() for query in group]
+
+    async def request(client):
+        return await client.get("/api/products/search", params={"q": random.choice(queries), "limit": 20})
+
+    try:
+        summarize(
+            "GET /api/products/search",
+            *asyncio.run(hammer(f"http://127.0.0.1:{args.port}", request, args.concurrency, args.duration)),
+            args.duration
+        )
+    finally:
+        server.should_exit = True
+        thread.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def configure(**overrides: str) -> str:
+    directory = tempfile.mkdtemp(prefix="jewelry-bench-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(directory, 'bench.db')}")
+    os.environ.setdefault("AI_IMAGE_GENERATOR", "fake")
+    os.environ.setdefault("GUEST_CART_STORE_PATH", "")
+    os.environ.setdefault("STATIC_PRECOMPRESSED_DIR", os.path.join(directory, "precompressed"))
+    for key, value in overrides.items():
+        os.environ.setdefault(key, value)
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(directory)
+    return directory
+
+def seed_products(count: int) -> None:
+    from database import SessionLocal
+    from models.models import Category, Jeweler, Product, ProductImage
+
+    db = SessionLocal()
+    try:
+        jeweler = Jeweler(name="Bench", shop_name="Bench", email="bench@example.com")
+        category = Category(name="Bench")
+        db.add_all([jeweler, category])
+        db.flush()
+        for index in range(count):
+            db.add(Product(
+                name=f"Bench {index}",
+                price=100 + index,
+                stock_quantity=10,
+                jeweler_id=jeweler.id,
+                categories=[category],
+                images=[ProductImage(image_path=f"static/products/bench-{index}.png")]
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+def start_server(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+async def hammer(
+    base_url: str,
+    make_request: Callable,
+    concurrency: int,
+    duration: float
+) -> Tuple[List[float], Dict[int, int]]:
+    import httpx
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await make_request(client)
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses
+
+def summarize(label: str, latencies: List[float], statuses: Dict[int, int], duration: float) -> dict:
+    ordered = sorted(latencies)
+    result = {
+        "label": label,
+        "requests": len(ordered),
+        "rps": len(ordered) / duration,
+        "p50_ms": statistics.median(ordered) * 1000 if ordered else 0.0,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000 if ordered else 0.0,
+        "statuses": statuses
+    }
+    print(
+        f"{label:<28} {result['requests']:>7} req  {result['rps']:>8.1f} req/s  "
+        f"p50 {result['p50_ms']:>7.1f} ms  p99 {result['p99_ms']:>7.1f} ms  {statuses}"
+    )
+    return result
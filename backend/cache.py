@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+from fastapi.encoders import jsonable_encoder
+from config import settings
+
+_MISSING = object()
+
+def estimate_size(value: Any) -> int:
+    return len(json.dumps(jsonable_encoder(value), default=str))
+
+class TTLCache:
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is not _MISSING:
+            return value
+        generation = self._generation
+        value = loader()
+        if value is not None:
+            self.set(key, value, generation=generation)
+        return value
+
+    async def get_or_load_async(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not _MISSING:
+            return value
+        generation = self._generation
+        value = await loader()
+        if value is not None:
+            self.set(key, value, generation=generation)
+        return value
+
+    def invalidate(self, *keys: Hashable) -> None:
+        self.invalidate_many(keys)
+
+    def invalidate_many(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+catalog_cache = TTLCache(
+    max_bytes=settings.CATALOG_CACHE_MAX_BYTES,
+    ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS
+)
+
+principal_cache = TTLCache(
+    max_bytes=settings.PRINCIPAL_CACHE_MAX_BYTES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+CATEGORIES_KEY = ("categories",)
+CATEGORY_TREE_KEY = ("category_tree",)
+JEWELERS_KEY = ("jewelers",)
+
+def product_key(product_id: int) -> tuple:
+    return ("product", product_id)
+
+def principal_key(user_id: int) -> tuple:
+    return ("principal", user_id)
+
+def invalidate_products(product_ids: Iterable[int]) -> None:
+    catalog_cache.invalidate_many(product_key(pid) for pid in product_ids)
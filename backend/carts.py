@@ -0,0 +1,233 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Sequence, Set
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models.models import Cart, CartItem, Product
+from schemas import CartOperation, CartResponse, CartSummaryResponse, GuestCartResponse
+from inventory import reserve
+from guest_carts import guest_cart_store
+
+def _cart_total_values() -> dict:
+    subtotal = select(func.coalesce(func.sum(Product.price * CartItem.quantity), 0)).select_from(
+        CartItem
+    ).join(Product, Product.id == CartItem.product_id).where(
+        CartItem.cart_id == Cart.id
+    ).scalar_subquery()
+    item_count = select(func.coalesce(func.sum(CartItem.quantity), 0)).where(
+        CartItem.cart_id == Cart.id
+    ).scalar_subquery()
+    return {"subtotal": subtotal, "item_count": item_count, "updated_at": datetime.utcnow()}
+
+def refresh_cart_totals(db: Session, cart_ids: Iterable[int]) -> None:
+    cart_ids = list(set(cart_ids))
+    if not cart_ids:
+        return
+    db.flush()
+    db.execute(
+        update(Cart)
+        .where(Cart.id.in_(cart_ids))
+        .values(**_cart_total_values())
+        .execution_options(synchronize_session=False)
+    )
+
+def refresh_all_cart_totals(connection: Connection) -> None:
+    connection.execute(update(Cart).values(**_cart_total_values()))
+
+def refresh_carts_containing(db: Session, product_ids: Iterable[int]) -> None:
+    product_ids = list(set(product_ids))
+    if not product_ids:
+        return
+    db.flush()
+    db.execute(
+        update(Cart)
+        .where(Cart.id.in_(
+            select(CartItem.cart_id).where(CartItem.product_id.in_(product_ids)).scalar_subquery()
+        ))
+        .values(**_cart_total_values())
+        .execution_options(synchronize_session=False)
+    )
+
+def get_or_create_cart(db: Session, user_id: int) -> Cart:
+    cart = db.query(Cart).filter(Cart.user_id == user_id).first()
+    if not cart:
+        cart = Cart(user_id=user_id)
+        db.add(cart)
+        db.flush()
+    return cart
+
+def apply_operations(
+    quantities: Dict[int, int],
+    operations: Sequence[CartOperation],
+    item_products: Optional[Dict[int, int]] = None
+) -> Set[int]:
+    touched = set()
+    for operation in operations:
+        product_id = operation.product_id
+        if product_id is None and operation.item_id is not None and item_products:
+            product_id = item_products.get(operation.item_id)
+        if product_id is None:
+            raise HTTPException(status_code=404, detail="Cart item not found")
+        if operation.op == "add":
+            if operation.quantity < 1:
+                raise HTTPException(status_code=400, detail="Quantity must be at least 1")
+            quantities[product_id] = quantities.get(product_id, 0) + operation.quantity
+        elif product_id not in quantities:
+            raise HTTPException(status_code=404, detail="Cart item not found")
+        elif operation.op == "update" and operation.quantity > 0:
+            quantities[product_id] = operation.quantity
+        else:
+            del quantities[product_id]
+        touched.add(product_id)
+    return touched
+
+def apply_cart_operations(db: Session, user_id: int, operations: Sequence[CartOperation]) -> Cart:
+    cart = get_or_create_cart(db, user_id)
+    items = {item.product_id: item for item in db.query(CartItem).filter(CartItem.cart_id == cart.id)}
+    quantities = {product_id: item.quantity for product_id, item in items.items()}
+    touched = apply_operations(
+        quantities, operations, {item.id: product_id for product_id, item in items.items()}
+    )
+    
+    new_product_ids = {product_id for product_id in touched if product_id in quantities} - set(items)
+    if new_product_ids:
+        found = {row.id for row in db.query(Product.id).filter(Product.id.in_(new_product_ids))}
+        if new_product_ids - found:
+            raise HTTPException(status_code=404, detail="Product not found")
+    
+    reserve(db, user_id, {product_id: quantities.get(product_id, 0) for product_id in touched})
+    for product_id in touched:
+        item = items.get(product_id)
+        quantity = quantities.get(product_id, 0)
+        if quantity <= 0:
+            if item:
+                db.delete(item)
+        elif item:
+            item.quantity = quantity
+        else:
+            db.add(CartItem(cart_id=cart.id, product_id=product_id, quantity=quantity))
+    refresh_cart_totals(db, [cart.id])
+    return cart
+
+def merge_guest_cart(db: Session, user_id: int, guest_cart_id: Optional[str]) -> bool:
+    lines = guest_cart_store.get(guest_cart_id) if guest_cart_id else {}
+    if not lines:
+        return False
+    apply_cart_operations(db, user_id, [
+        CartOperation(op="add", product_id=product_id, quantity=quantity)
+        for product_id, quantity in lines.items()
+    ])
+    return True
+
+def merge_guest_cart_now(user_id: int, guest_cart_id: Optional[str]) -> bool:
+    db = SessionLocal()
+    try:
+        if not merge_guest_cart(db, user_id, guest_cart_id):
+            return False
+        db.commit()
+        guest_cart_store.delete(guest_cart_id)
+        return True
+    finally:
+        db.close()
+
+def cart_rows_statement(user_id: int):
+    return select(
+        Cart.id.label("cart_id"),
+        Cart.updated_at,
+        Cart.subtotal,
+        Cart.item_count,
+        CartItem.id.label("item_id"),
+        CartItem.product_id,
+        CartItem.quantity,
+        Product.name,
+        Product.price,
+        Product.material,
+        Product.karat,
+        Product.image_path
+    ).select_from(Cart).outerjoin(
+        CartItem, CartItem.cart_id == Cart.id
+    ).outerjoin(
+        Product, Product.id == CartItem.product_id
+    ).where(Cart.user_id == user_id).order_by(CartItem.id)
+
+def cart_summary_statement(user_id: int):
+    return select(Cart.item_count, Cart.subtotal).where(Cart.user_id == user_id)
+
+def build_cart_response(user_id: int, rows: Sequence) -> Optional[CartResponse]:
+    if not rows:
+        return None
+    head = rows[0]
+    return CartResponse(
+        id=head.cart_id,
+        user_id=user_id,
+        updated_at=head.updated_at,
+        items=[
+            {
+                "id": row.item_id,
+                "cart_id": head.cart_id,
+                "product_id": row.product_id,
+                "quantity": row.quantity,
+                "product": {
+                    "id": row.product_id,
+                    "name": row.name,
+                    "price": row.price,
+                    "material": row.material,
+                    "karat": row.karat,
+                    "image_path": row.image_path
+                }
+            }
+            for row in rows if row.item_id is not None
+        ],
+        item_count=head.item_count,
+        total=head.subtotal
+    )
+
+def build_cart_summary(row) -> CartSummaryResponse:
+    if row is None:
+        return CartSummaryResponse()
+    return CartSummaryResponse(item_count=row.item_count, total=row.subtotal)
+
+def guest_products_statement(product_ids: Iterable[int]):
+    return select(
+        Product.id,
+        Product.name,
+        Product.price,
+        Product.material,
+        Product.karat,
+        Product.image_path,
+        Product.stock_quantity
+    ).where(Product.id.in_(list(product_ids)))
+
+def check_guest_lines(lines: Dict[int, int], touched: Set[int], products: Dict[int, object]) -> None:
+    for product_id in touched:
+        if product_id not in lines:
+            continue
+        product = products.get(product_id)
+        if product is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        if lines[product_id] > product.stock_quantity:
+            raise HTTPException(status_code=400, detail="Not enough stock")
+
+def build_guest_cart_response(lines: Dict[int, int], products: Dict[int, object]) -> GuestCartResponse:
+    items = [
+        {
+            "product_id": product_id,
+            "quantity": quantity,
+            "product": {
+                "id": product_id,
+                "name": products[product_id].name,
+                "price": products[product_id].price,
+                "material": products[product_id].material,
+                "karat": products[product_id].karat,
+                "image_path": products[product_id].image_path
+            }
+        }
+        for product_id, quantity in lines.items() if product_id in products
+    ]
+    return GuestCartResponse(
+        items=items,
+        item_count=sum(item["quantity"] for item in items),
+        total=sum(item["product"]["price"] * item["quantity"] for item in items)
+    )
@@ -6,10 +6,64 @@ load_dotenv()
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "mysql+pymysql://root:@localhost:3306/jewelry_db"
+    ASYNC_DATABASE_URL: str = ""
+    DATABASE_READ_URL: str = ""
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PRE_PING: bool = True
     GEMINI_API_KEY: str = ""
+    STATIC_PRECOMPRESSED_DIR: str = "precompressed"
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 64 * 1024
+    IMAGE_THUMB_SIZE: int = 200
+    IMAGE_MEDIUM_SIZE: int = 800
+    IMAGE_DERIVATIVE_QUALITY: int = 82
+    IMAGE_DERIVATIVE_WORKERS: int = 2
+    IMAGE_DERIVATIVE_MAX_PENDING: int = 32
+    AI_IMAGE_GENERATOR: str = "gemini"
+    AI_FAKE_GENERATOR_DELAY_SECONDS: float = 0.5
+    AI_JOB_WORKERS: int = 4
+    AI_JOB_MAX_PENDING: int = 100
+    AI_JOB_MAX_ATTEMPTS: int = 3
+    AI_JOB_TIMEOUT_SECONDS: int = 60
+    AI_JOB_RETRY_BACKOFF_SECONDS: float = 1.0
+    AI_JOB_RESULT_TTL_SECONDS: int = 3600
+    AI_DESIGN_CACHE_MAX_ENTRIES: int = 1000
+    AI_DESIGN_CACHE_VARIANTS: int = 1
+    CORS_ORIGINS: str = ""
+    CORS_ORIGIN_REGEX: str = r"https?://(localhost|127\.0\.0\.1)(:\d+)?"
     SECRET_KEY: str = "your_super_secret_key_for_jwt_token_generation_change_in_production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    REVOCATION_PRUNE_INTERVAL_SECONDS: int = 3600
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+    PASSWORD_HASH_NICENESS: int = 10
+    CATALOG_CACHE_TTL_SECONDS: int = 300
+    CATALOG_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    CATALOG_HTTP_MAX_AGE_SECONDS: int = 0
+    CATALOG_HTTP_SHARED_MAX_AGE_SECONDS: int = 60
+    CATALOG_HTTP_STALE_WHILE_REVALIDATE_SECONDS: int = 30
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_BYTES: int = 4 * 1024 * 1024
+    CART_RESERVATION_TTL_SECONDS: int = 900
+    CHECKOUT_RESERVATION_TTL_SECONDS: int = 600
+    RESERVATION_REAPER_INTERVAL_SECONDS: int = 30
+    RESERVATION_REAPER_BATCH_SIZE: int = 500
+    GUEST_CART_COOKIE: str = "guest_cart"
+    GUEST_CART_TTL_SECONDS: int = 7 * 24 * 3600
+    GUEST_CART_MAX_ENTRIES: int = 10000
+    GUEST_CART_MAX_LINES: int = 50
+    GUEST_CART_STORE_PATH: str = "guest_carts.sqlite3"
+    GUEST_CART_PRUNE_INTERVAL_SECONDS: int = 3600
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_WAIT_TIMEOUT_SECONDS: int = 10
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: int = 60
+    IDEMPOTENCY_PRUNE_INTERVAL_SECONDS: int = 3600
 
     class Config:
         env_file = ".env"
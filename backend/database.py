@@ -1,15 +1,66 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
+from db_metrics import pool_metrics, TimedAsyncQueuePool, TimedQueuePool
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING
+)
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)).render_as_string(
+        hide_password=False
+    )
+
+engine = create_engine(settings.DATABASE_URL, poolclass=TimedQueuePool, **POOL_OPTIONS)
+read_engine = (
+    create_engine(settings.DATABASE_READ_URL, poolclass=TimedQueuePool, **POOL_OPTIONS)
+    if settings.DATABASE_READ_URL else engine
+)
+
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    poolclass=TimedAsyncQueuePool,
+    **POOL_OPTIONS
+)
+async_read_engine = (
+    create_async_engine(
+        async_database_url(settings.DATABASE_READ_URL),
+        poolclass=TimedAsyncQueuePool,
+        **POOL_OPTIONS
+    )
+    if settings.DATABASE_READ_URL else async_engine
 )
 
+pool_metrics.register("write", engine)
+pool_metrics.register("read", read_engine)
+pool_metrics.register("async_write", async_engine.sync_engine)
+pool_metrics.register("async_read", async_read_engine.sync_engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 Base = declarative_base()
 
@@ -20,5 +71,20 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
 def init_db():
     Base.metadata.create_all(bind=engine)
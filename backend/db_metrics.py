@@ -0,0 +1,152 @@
+import bisect
+import contextvars
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_current_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("db_metrics_scope", default=None)
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{b:g}" for b in self.buckets] + ["le_inf"]
+        return {
+            "count": self.count,
+            "sum_ms": round(self.total, 3),
+            "avg_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines: Dict[str, Engine] = {}
+        self._wait: Dict[str, Histogram] = {}
+        self._timeouts: Dict[str, int] = {}
+        self._hold: Dict[str, Histogram] = {}
+
+    def register(self, name: str, engine: Engine) -> None:
+        if engine in self._engines.values():
+            return
+        with self._lock:
+            self._engines[name] = engine
+            self._wait[name] = Histogram()
+            self._timeouts[name] = 0
+        engine.pool._metrics_name = name
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def observe_wait(self, name: str, elapsed_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if name not in self._wait:
+                return
+            self._wait[name].observe(elapsed_ms)
+            if timed_out:
+                self._timeouts[name] += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        connection_record.info["route"] = _route_label(_current_scope.get())
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        started = connection_record.info.pop("checked_out_at", None)
+        route = connection_record.info.pop("route", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._hold.setdefault(route or "<background>", Histogram()).observe(elapsed_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            engines = {}
+            for name, engine in self._engines.items():
+                pool = engine.pool
+                engines[name] = {
+                    "url": engine.url.render_as_string(hide_password=True),
+                    "pool_size": pool.size(),
+                    "checked_out": pool.checkedout(),
+                    "checked_in": pool.checkedin(),
+                    "overflow": pool.overflow(),
+                    "max_overflow": pool._max_overflow,
+                    "timeout_seconds": pool.timeout(),
+                    "timeouts": self._timeouts[name],
+                    "wait": self._wait[name].snapshot()
+                }
+            return {
+                "engines": engines,
+                "routes": {route: hist.snapshot() for route, hist in sorted(self._hold.items())}
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            for name in self._wait:
+                self._wait[name] = Histogram()
+                self._timeouts[name] = 0
+            self._hold.clear()
+
+pool_metrics = PoolMetrics()
+
+def _route_label(scope: Optional[dict]) -> Optional[str]:
+    if scope is None:
+        return None
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}".strip()
+
+class _TimedCheckoutMixin:
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            name = getattr(self, "_metrics_name", None)
+            if name:
+                pool_metrics.observe_wait(name, (time.perf_counter() - started) * 1000, timed_out)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool._metrics_name = getattr(self, "_metrics_name", None)
+        return pool
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+class RouteScopeMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
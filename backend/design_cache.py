@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from database import SessionLocal
+from models.models import UserGeneratedDesign
+from schemas import UserGeneratedDesignCreate
+from design_generation import (
+    GENERATED_DESIGNS_DIR, construct_design_prompt, normalize_design, save_generated_image, selected_options
+)
+from image_derivatives import VARIANTS, derivative_path
+from config import settings
+
+KEY_LENGTH = 32
+
+_STORED_IMAGE = re.compile(r"^([0-9a-f]{%d})-[0-9a-f]{8}\.png$" % KEY_LENGTH)
+
+# A freshly stored image has no design row until the job finishes; leave files this young alone.
+ORPHAN_GRACE_SECONDS = 300
+
+def design_cache_key(data: UserGeneratedDesignCreate) -> str:
+    data = normalize_design(data)
+    canonical = json.dumps(
+        {"options": selected_options(data), "prompt": construct_design_prompt(data)},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:KEY_LENGTH]
+
+class DesignCache:
+    def __init__(self, max_entries: int, variants: int):
+        self.max_entries = max_entries
+        self.variants = max(variants, 1)
+        self._entries: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            pool = self._entries.get(key)
+            if not pool or len(pool) < self.variants:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            cursor = self._cursor.get(key, 0)
+            self._cursor[key] = cursor + 1
+            self.hits += 1
+            return pool[cursor % len(pool)]
+
+    def store(self, key: str, image_data: str) -> str:
+        path = save_generated_image(image_data, f"{key}-{uuid.uuid4().hex[:8]}.png")
+        with self._lock:
+            dropped = self._remember(key, path)
+        discard_unreferenced(dropped)
+        return path
+
+    def load(self, directory: str = GENERATED_DESIGNS_DIR) -> int:
+        found = []
+        for name in os.listdir(directory):
+            match = _STORED_IMAGE.match(name)
+            if match:
+                path = os.path.join(directory, name)
+                found.append((os.path.getmtime(path), match.group(1), path))
+        dropped = []
+        with self._lock:
+            for _, key, path in sorted(found):
+                if path not in self._entries.get(key, ()):
+                    dropped.extend(self._remember(key, path))
+        discard_unreferenced(dropped)
+        return len(found)
+
+    def _remember(self, key: str, path: str) -> List[str]:
+        dropped = []
+        pool = self._entries.setdefault(key, [])
+        if len(pool) < self.variants:
+            pool.append(path)
+        else:
+            dropped.append(path)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            oldest, paths = self._entries.popitem(last=False)
+            self._cursor.pop(oldest, None)
+            self.evictions += 1
+            dropped.extend(paths)
+        return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._cursor.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "variants": self.variants,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+def discard_unreferenced(paths: List[str]) -> int:
+    cutoff = time.time() - ORPHAN_GRACE_SECONDS
+    paths = [path for path in paths if os.path.exists(path) and os.path.getmtime(path) < cutoff]
+    if not paths:
+        return 0
+    db = SessionLocal()
+    try:
+        referenced = {url for (url,) in db.query(UserGeneratedDesign.generated_image_url).filter(
+            UserGeneratedDesign.generated_image_url.in_(paths)
+        )}
+    finally:
+        db.close()
+    removed = 0
+    for path in paths:
+        if path in referenced:
+            continue
+        for target in [path] + [derivative_path(path, variant) for variant in VARIANTS]:
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                continue
+        removed += 1
+    return removed
+
+design_cache = DesignCache(
+    max_entries=settings.AI_DESIGN_CACHE_MAX_ENTRIES,
+    variants=settings.AI_DESIGN_CACHE_VARIANTS
+)
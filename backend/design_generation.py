@@ -0,0 +1,123 @@
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+import zlib
+from typing import Awaitable, Callable, Optional
+from schemas import UserGeneratedDesignCreate
+from config import settings
+
+GENERATED_DESIGNS_DIR = "static/generated_designs"
+os.makedirs(GENERATED_DESIGNS_DIR, exist_ok=True)
+
+ImageGenerator = Callable[[str], Awaitable[Optional[str]]]
+
+def construct_design_prompt(data: UserGeneratedDesignCreate) -> str:
+    prompt = f"""Create a stunning, photorealistic image of a {data.type.lower()} jewelry piece.
+
+Design specifications:
+- Type: {data.type}
+- Material: {data.material} ({data.karat})
+- Color: {data.color}
+- Shape: {data.shape}
+"""
+    
+    if data.gemstone_type and data.gemstone_type.lower() != "none":
+        prompt += f"- Gemstone: {data.gemstone_type}"
+        if data.gemstone_color:
+            prompt += f" ({data.gemstone_color})"
+        prompt += "\n"
+    
+    prompt += """
+Style requirements:
+- Professional jewelry photography
+- Clean, elegant presentation
+- High-end luxury appearance
+- Soft lighting with subtle reflections
+- White or light gray background
+- Focus on the jewelry piece
+- Show intricate details and craftsmanship
+- Realistic metallic finish appropriate for the material
+- If gemstones are specified, show proper brilliance and clarity
+
+The image should look like it belongs in a high-end jewelry catalog or advertisement."""
+    
+    return prompt
+
+async def generate_image_with_gemini(prompt: str) -> Optional[str]:
+    try:
+        import google.generativeai as genai
+        
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        
+        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        
+        response = await model.generate_content_async(prompt)
+        
+        if response.candidates and response.candidates[0].content.parts:
+            for part in response.candidates[0].content.parts:
+                if hasattr(part, 'inline_data') and part.inline_data:
+                    return part.inline_data.data
+        
+        return None
+    except Exception as e:
+        print(f"Error generating image: {str(e)}")
+        return None
+
+def save_generated_image(image_data: str, filename: str) -> str:
+    file_path = os.path.join(GENERATED_DESIGNS_DIR, filename)
+    
+    if isinstance(image_data, str):
+        try:
+            image_bytes = base64.b64decode(image_data)
+        except:
+            image_bytes = image_data.encode('utf-8')
+    else:
+        image_bytes = image_data
+    
+    with open(file_path, 'wb') as f:
+        f.write(image_bytes)
+    
+    return file_path
+
+def _solid_png(width: int, height: int, rgb: bytes) -> bytes:
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+    
+    raw = b"".join(b"\x00" + rgb * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+async def generate_image_fake(prompt: str) -> Optional[str]:
+    await asyncio.sleep(settings.AI_FAKE_GENERATOR_DELAY_SECONDS)
+    rgb = hashlib.sha256(prompt.encode("utf-8")).digest()[:3]
+    return base64.b64encode(_solid_png(64, 64, rgb)).decode("ascii")
+
+IMAGE_GENERATORS = {
+    "gemini": generate_image_with_gemini,
+    "fake": generate_image_fake,
+}
+
+def get_image_generator() -> ImageGenerator:
+    return IMAGE_GENERATORS[settings.AI_IMAGE_GENERATOR]
+
+def normalize_design(data: UserGeneratedDesignCreate) -> UserGeneratedDesignCreate:
+    return UserGeneratedDesignCreate(**{
+        key: value.strip().lower() for key, value in selected_options(data).items()
+    })
+
+def selected_options(data: UserGeneratedDesignCreate) -> dict:
+    return {
+        "type": data.type,
+        "color": data.color,
+        "shape": data.shape,
+        "material": data.material,
+        "karat": data.karat,
+        "gemstone_type": data.gemstone_type,
+        "gemstone_color": data.gemstone_color
+    }
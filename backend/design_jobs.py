@@ -0,0 +1,252 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from database import SessionLocal
+from models.models import UserGeneratedDesign
+from schemas import UserGeneratedDesignCreate, UserGeneratedDesignResponse
+from design_generation import construct_design_prompt, get_image_generator, normalize_design, selected_options
+from design_cache import design_cache, design_cache_key
+from image_derivatives import derivatives_ready, generate_derivatives
+from config import settings
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+class DesignJob:
+    def __init__(self, user_id: Optional[int], design_data: UserGeneratedDesignCreate):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.design_data = design_data
+        self.cache_key = design_cache_key(design_data)
+        self.cached = False
+        self.coalesced = False
+        self.leader: Optional[asyncio.Future] = None
+        self.status = JOB_QUEUED
+        self.attempts = 0
+        self.design: Optional[UserGeneratedDesignResponse] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.updated_at = self.created_at
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def update(self, status: str, **fields) -> None:
+        self.status = status
+        for key, value in fields.items():
+            setattr(self, key, value)
+        self.updated_at = datetime.utcnow()
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def wait_finished(self) -> None:
+        while not self.finished:
+            await self.wait_for_change()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "cached": self.cached,
+            "coalesced": self.coalesced,
+            "design": self.design,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+class DesignJobQueue:
+    def __init__(self, workers: int, max_pending: int, max_attempts: int, result_ttl_seconds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.result_ttl_seconds = result_ttl_seconds
+        self._jobs: Dict[str, DesignJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._side_tasks: Set[asyncio.Task] = set()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.completed = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, user_id: Optional[int], design_data: UserGeneratedDesignCreate) -> DesignJob:
+        self._prune()
+        job = DesignJob(user_id, design_data)
+        cached_path = design_cache.lookup(job.cache_key)
+        if cached_path:
+            job.cached = True
+            self._jobs[job.id] = job
+            self._spawn(self._finish(job, cached_path))
+            return job
+        leader = self._inflight.get(job.cache_key)
+        if leader is not None:
+            job.coalesced = True
+            self.coalesced += 1
+            self._jobs[job.id] = job
+            self._spawn(self._follow(job, leader))
+            return job
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Design generation queue is full, try again shortly",
+                headers={"Retry-After": "5"},
+            )
+        self._jobs[job.id] = job
+        job.leader = asyncio.get_running_loop().create_future()
+        self._inflight[job.cache_key] = job.leader
+        return job
+
+    def get(self, job_id: str) -> Optional[DesignJob]:
+        return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        states: Dict[str, int] = {}
+        for job in self._jobs.values():
+            states[job.status] = states.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "jobs": states,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight)
+        }
+
+    def _prune(self) -> None:
+        cutoff = datetime.utcnow() - timedelta(seconds=self.result_ttl_seconds)
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.updated_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._side_tasks.add(task)
+        task.add_done_callback(self._side_tasks.discard)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            image_path = None
+            try:
+                image_path = await self._run(job)
+            except Exception as e:
+                self.failed += 1
+                job.update(JOB_FAILED, error=str(e))
+            finally:
+                self._settle(job, image_path)
+                self._queue.task_done()
+
+    def _settle(self, job: DesignJob, image_path: Optional[str]) -> None:
+        if job.leader is None:
+            return
+        if self._inflight.get(job.cache_key) is job.leader:
+            del self._inflight[job.cache_key]
+        if not job.leader.done():
+            job.leader.set_result(image_path)
+
+    async def _follow(self, job: DesignJob, leader: asyncio.Future) -> None:
+        job.update(JOB_RUNNING)
+        image_path = await asyncio.shield(leader)
+        if not image_path:
+            self.failed += 1
+            job.update(JOB_FAILED, error="Failed to generate image with AI")
+            return
+        await self._finish(job, image_path)
+
+    async def _run(self, job: DesignJob) -> Optional[str]:
+        prompt = construct_design_prompt(normalize_design(job.design_data))
+        generator = get_image_generator()
+        image_data = None
+        for attempt in range(1, self.max_attempts + 1):
+            job.update(JOB_RUNNING, attempts=attempt)
+            self.upstream_calls += 1
+            try:
+                image_data = await asyncio.wait_for(generator(prompt), settings.AI_JOB_TIMEOUT_SECONDS)
+            except Exception:
+                image_data = None
+            if image_data:
+                break
+            if attempt < self.max_attempts:
+                self.retries += 1
+                await asyncio.sleep(settings.AI_JOB_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        
+        if not image_data:
+            self.failed += 1
+            job.update(JOB_FAILED, error="Failed to generate image with AI")
+            return None
+        
+        image_path = await run_in_threadpool(design_cache.store, job.cache_key, image_data)
+        self._settle(job, image_path)
+        await self._finish(job, image_path)
+        self._spawn(generate_derivatives(image_path))
+        return image_path
+
+    async def _finish(self, job: DesignJob, image_path: str) -> None:
+        try:
+            design = await run_in_threadpool(_store_design, job.user_id, job.design_data, image_path)
+        except Exception as e:
+            self.failed += 1
+            job.update(JOB_FAILED, error=str(e))
+            return
+        self.completed += 1
+        job.update(JOB_SUCCEEDED, design=design)
+
+def _store_design(user_id: Optional[int], design_data: UserGeneratedDesignCreate, image_path: str) -> UserGeneratedDesignResponse:
+    db = SessionLocal()
+    try:
+        design = UserGeneratedDesign(
+            user_id=user_id,
+            selected_options=selected_options(design_data),
+            generated_image_url=image_path,
+            derivatives_ready=derivatives_ready(db, image_path)
+        )
+        db.add(design)
+        db.commit()
+        db.refresh(design)
+        return UserGeneratedDesignResponse.model_validate(design)
+    finally:
+        db.close()
+
+design_job_queue = DesignJobQueue(
+    workers=settings.AI_JOB_WORKERS,
+    max_pending=settings.AI_JOB_MAX_PENDING,
+    max_attempts=settings.AI_JOB_MAX_ATTEMPTS,
+    result_ttl_seconds=settings.AI_JOB_RESULT_TTL_SECONDS
+)
@@ -0,0 +1,177 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from models.models import Product, Category, Jeweler
+
+PRICE_BUCKETS = [0, 500, 1000, 2500, 5000, 10000]
+DIMENSIONS = ("category", "material", "karat", "jeweler", "price_bucket")
+
+def price_bucket(price: float) -> str:
+    index = bisect.bisect_right(PRICE_BUCKETS, price) - 1
+    lower = PRICE_BUCKETS[max(index, 0)]
+    if index + 1 < len(PRICE_BUCKETS):
+        return f"{lower}-{PRICE_BUCKETS[index + 1]}"
+    return f"{lower}+"
+
+PRICE_BUCKET_LABELS = [price_bucket(lower) for lower in PRICE_BUCKETS]
+
+def _normalize(value: Optional[str]) -> Optional[str]:
+    return value.strip().lower() if value and value.strip() else None
+
+def facet_value_filter(column, value: Optional[str]):
+    value = _normalize(value)
+    return None if value is None else func.lower(func.trim(column)) == value
+
+class FacetIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.built = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self._records: Dict[int, Tuple] = {}
+        self._values: Dict[str, Dict] = {dim: defaultdict(set) for dim in DIMENSIONS}
+        self._prices: List[Tuple[float, int]] = []
+        self._labels: Dict[str, Dict] = {dim: {} for dim in DIMENSIONS}
+        self._category_parents: Dict[int, Optional[int]] = {}
+
+    def ensure_built(self, db: Session) -> None:
+        if self.built:
+            return
+        with self._lock:
+            if self.built:
+                return
+            self._reset()
+            for category in db.query(Category).all():
+                self._category_parents[category.id] = category.parent_id
+                self._labels["category"][category.id] = category.name
+            for jeweler in db.query(Jeweler).all():
+                self._labels["jeweler"][jeweler.id] = jeweler.shop_name
+            products = db.query(Product).options(selectinload(Product.categories)).all()
+            for product in products:
+                self._add(product)
+            self.built = True
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.built = False
+            self._reset()
+
+    def index_product(self, product: Product) -> None:
+        with self._lock:
+            if not self.built:
+                return
+            self._remove(product.id)
+            self._add(product)
+
+    def remove_product(self, product_id: int) -> None:
+        with self._lock:
+            if self.built:
+                self._remove(product_id)
+
+    def counts(
+        self,
+        category_id: Optional[int] = None,
+        material: Optional[str] = None,
+        karat: Optional[str] = None,
+        jeweler_id: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> dict:
+        filters = {
+            "category": category_id,
+            "material": _normalize(material),
+            "karat": _normalize(karat),
+            "jeweler": jeweler_id
+        }
+        price_range = (min_price, max_price)
+        with self._lock:
+            result = {"total": self._count(self._matching(filters, price_range), None)}
+            for dim in DIMENSIONS:
+                base = self._matching(filters, price_range, exclude=dim)
+                values = self._values[dim]
+                labels = self._labels[dim]
+                keys = PRICE_BUCKET_LABELS if dim == "price_bucket" else list(values)
+                result[dim] = [
+                    {"value": value, "label": labels.get(value, value), "count": self._count(base, values.get(value, set()))}
+                    for value in keys
+                ]
+            return result
+
+    def _matching(self, filters: dict, price_range: tuple, exclude: Optional[str] = None) -> Optional[Set[int]]:
+        result: Optional[Set[int]] = None
+        for dim, value in filters.items():
+            if dim == exclude or value is None:
+                continue
+            ids = self._values[dim].get(value, set())
+            result = set(ids) if result is None else result & ids
+        min_price, max_price = price_range
+        if exclude != "price_bucket" and (min_price is not None or max_price is not None):
+            lo = 0 if min_price is None else bisect.bisect_left(self._prices, (min_price, -1))
+            hi = len(self._prices) if max_price is None else bisect.bisect_right(self._prices, (max_price, float("inf")))
+            ids = {product_id for _, product_id in self._prices[lo:hi]}
+            result = ids if result is None else result & ids
+        return result
+
+    def _count(self, base: Optional[Set[int]], ids: Optional[Set[int]]) -> int:
+        if ids is None:
+            return len(self._records) if base is None else len(base)
+        return len(ids) if base is None else len(base.intersection(ids))
+
+    def _ancestors(self, category_id: int) -> Set[int]:
+        seen = set()
+        while category_id is not None and category_id not in seen:
+            seen.add(category_id)
+            category_id = self._category_parents.get(category_id)
+        return seen
+
+    def _add(self, product: Product) -> None:
+        categories = set()
+        for category in product.categories:
+            categories |= self._ancestors(category.id)
+        material = _normalize(product.material)
+        karat = _normalize(product.karat)
+        record = (
+            tuple(categories),
+            material,
+            karat,
+            product.jeweler_id,
+            price_bucket(product.price),
+            product.price
+        )
+        self._records[product.id] = record
+        for category_id in categories:
+            self._values["category"][category_id].add(product.id)
+        if material:
+            self._values["material"][material].add(product.id)
+            self._labels["material"].setdefault(material, product.material.strip())
+        if karat:
+            self._values["karat"][karat].add(product.id)
+            self._labels["karat"].setdefault(karat, product.karat.strip())
+        self._values["jeweler"][product.jeweler_id].add(product.id)
+        self._values["price_bucket"][record[4]].add(product.id)
+        bisect.insort(self._prices, (product.price, product.id))
+
+    def _remove(self, product_id: int) -> None:
+        record = self._records.pop(product_id, None)
+        if record is None:
+            return
+        categories, material, karat, jeweler_id, bucket, price = record
+        keys = [("category", c) for c in categories] + [
+            ("material", material), ("karat", karat), ("jeweler", jeweler_id), ("price_bucket", bucket)
+        ]
+        for dim, value in keys:
+            ids = self._values[dim].get(value)
+            if ids is None:
+                continue
+            ids.discard(product_id)
+            if not ids:
+                del self._values[dim][value]
+        index = bisect.bisect_left(self._prices, (price, product_id))
+        if index < len(self._prices) and self._prices[index] == (price, product_id):
+            del self._prices[index]
+
+facet_index = FacetIndex()
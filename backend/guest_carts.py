@@ -0,0 +1,135 @@
+import asyncio
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from fastapi.concurrency import run_in_threadpool
+from config import settings
+
+MAX_GUEST_CART_ID_LENGTH = 64
+
+def encode_lines(lines: Dict[int, int]) -> str:
+    return json.dumps(sorted(lines.items()), separators=(",", ":"))
+
+def decode_lines(raw: str) -> Dict[int, int]:
+    return {int(product_id): int(quantity) for product_id, quantity in json.loads(raw)}
+
+class GuestCartStore:
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def new_id() -> str:
+        return secrets.token_urlsafe(24)
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self._connection is None and self.path:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS guest_carts "
+                "(id TEXT PRIMARY KEY, lines TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def _remember(self, cart_id: str, lines: Dict[int, int], expires_at: float) -> None:
+        self._entries[cart_id] = (lines, expires_at)
+        self._entries.move_to_end(cart_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, cart_id: str) -> Dict[int, int]:
+        if len(cart_id) > MAX_GUEST_CART_ID_LENGTH:
+            return {}
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(cart_id)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(cart_id)
+            else:
+                self.misses += 1
+                db = self._db()
+                row = db.execute(
+                    "SELECT lines, expires_at FROM guest_carts WHERE id = ?", (cart_id,)
+                ).fetchone() if db else None
+                if row is None:
+                    return {}
+                entry = (decode_lines(row[0]), row[1])
+                self._remember(cart_id, *entry)
+            lines, expires_at = entry
+            return dict(lines) if expires_at > now else {}
+
+    def set(self, cart_id: str, lines: Dict[int, int]) -> None:
+        if not lines:
+            self.delete(cart_id)
+            return
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(cart_id, dict(lines), expires_at)
+            db = self._db()
+            if db:
+                db.execute(
+                    "INSERT OR REPLACE INTO guest_carts (id, lines, expires_at) VALUES (?, ?, ?)",
+                    (cart_id, encode_lines(lines), expires_at)
+                )
+                db.commit()
+
+    def delete(self, cart_id: str) -> None:
+        with self._lock:
+            self._entries.pop(cart_id, None)
+            db = self._db()
+            if db:
+                db.execute("DELETE FROM guest_carts WHERE id = ?", (cart_id,))
+                db.commit()
+
+    def prune(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [cart_id for cart_id, (_, expires_at) in self._entries.items() if expires_at <= now]
+            for cart_id in expired:
+                del self._entries[cart_id]
+            db = self._db()
+            if db:
+                pruned = db.execute("DELETE FROM guest_carts WHERE expires_at <= ?", (now,)).rowcount
+                db.commit()
+                return pruned
+        return len(expired)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persistent": bool(self.path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+guest_cart_store = GuestCartStore(
+    path=settings.GUEST_CART_STORE_PATH,
+    ttl_seconds=settings.GUEST_CART_TTL_SECONDS,
+    max_entries=settings.GUEST_CART_MAX_ENTRIES
+)
+
+async def run_guest_cart_pruner(interval_seconds: int = settings.GUEST_CART_PRUNE_INTERVAL_SECONDS) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(guest_cart_store.prune)
+        except Exception as e:
+            print(f"Error pruning guest carts: {str(e)}")
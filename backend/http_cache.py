@@ -0,0 +1,31 @@
+import hashlib
+from typing import Iterable, Optional
+from fastapi import Request, Response
+from config import settings
+
+CATALOG_CACHE_CONTROL = (
+    f"public, max-age={settings.CATALOG_HTTP_MAX_AGE_SECONDS}, "
+    f"s-maxage={settings.CATALOG_HTTP_SHARED_MAX_AGE_SECONDS}, "
+    f"stale-while-revalidate={settings.CATALOG_HTTP_STALE_WHILE_REVALIDATE_SECONDS}"
+)
+
+def version_etag(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+def versions_etag(kind: str, rows: Iterable) -> str:
+    return version_etag(kind, [(row.id, row.version) for row in rows])
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CATALOG_CACHE_CONTROL
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=dict(response.headers))
+    return None
@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models.models import IdempotencyKey
+from config import settings
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+POLL_INTERVAL_SECONDS = 0.1
+
+_CLAIMED = "claimed"
+_PENDING = "pending"
+
+def request_fingerprint(payload: Any) -> str:
+    raw = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class IdempotencyStore:
+    def __init__(self, ttl_seconds: int, wait_timeout_seconds: float, lock_timeout_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.wait_timeout_seconds = wait_timeout_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[int, str], threading.Event] = {}
+        self.claims = 0
+        self.replays = 0
+        self.waits = 0
+        self.conflicts = 0
+
+    def claim(self, user_id: int, key: str, fingerprint: str) -> Optional[JSONResponse]:
+        if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+        deadline = time.monotonic() + self.wait_timeout_seconds
+        waited = False
+        while True:
+            outcome = self._try_claim(user_id, key, fingerprint)
+            if outcome == _CLAIMED:
+                with self._lock:
+                    self._inflight[(user_id, key)] = threading.Event()
+                    self.claims += 1
+                return None
+            if outcome != _PENDING:
+                self.replays += 1
+                return outcome
+            if not waited:
+                self.waits += 1
+                waited = True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.conflicts += 1
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "1"},
+                )
+            event = self._inflight.get((user_id, key))
+            if event is not None:
+                event.wait(remaining)
+            else:
+                time.sleep(min(POLL_INTERVAL_SECONDS, remaining))
+
+    def _try_claim(self, user_id: int, key: str, fingerprint: str):
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            row = db.query(IdempotencyKey).filter(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key
+            ).first()
+            if row is not None and row.expires_at <= now:
+                db.delete(row)
+                db.commit()
+                row = None
+            if row is None:
+                db.add(IdempotencyKey(
+                    user_id=user_id,
+                    key=key,
+                    request_hash=fingerprint,
+                    locked_at=now,
+                    expires_at=now + timedelta(seconds=self.ttl_seconds)
+                ))
+                try:
+                    db.commit()
+                    return _CLAIMED
+                except IntegrityError:
+                    db.rollback()
+                    return _PENDING
+            if row.request_hash != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request"
+                )
+            if row.status_code is not None:
+                return JSONResponse(
+                    content=json.loads(row.response_body),
+                    status_code=row.status_code,
+                    headers={IDEMPOTENT_REPLAYED_HEADER: "true"}
+                )
+            stale_before = now - timedelta(seconds=self.lock_timeout_seconds)
+            if row.locked_at <= stale_before:
+                taken = db.query(IdempotencyKey).filter(
+                    IdempotencyKey.id == row.id,
+                    IdempotencyKey.status_code.is_(None),
+                    IdempotencyKey.locked_at == row.locked_at
+                ).update({"locked_at": now}, synchronize_session=False)
+                db.commit()
+                if taken == 1:
+                    return _CLAIMED
+            return _PENDING
+        finally:
+            db.close()
+
+    def record(self, db: Session, user_id: int, key: str, status_code: int, body: Any) -> None:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key
+        ).update({
+            "status_code": status_code,
+            "response_body": json.dumps(jsonable_encoder(body), separators=(",", ":")),
+            "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+        }, synchronize_session=False)
+
+    def release(self, user_id: int, key: str, completed: bool) -> None:
+        try:
+            if not completed:
+                db = SessionLocal()
+                try:
+                    db.query(IdempotencyKey).filter(
+                        IdempotencyKey.user_id == user_id,
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.status_code.is_(None)
+                    ).delete(synchronize_session=False)
+                    db.commit()
+                finally:
+                    db.close()
+        finally:
+            with self._lock:
+                event = self._inflight.pop((user_id, key), None)
+            if event is not None:
+                event.set()
+
+    def prune(self) -> int:
+        db = SessionLocal()
+        try:
+            pruned = db.query(IdempotencyKey).filter(
+                IdempotencyKey.expires_at <= datetime.utcnow()
+            ).delete(synchronize_session=False)
+            db.commit()
+            return pruned
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "inflight": len(self._inflight),
+            "claims": self.claims,
+            "replays": self.replays,
+            "waits": self.waits,
+            "conflicts": self.conflicts
+        }
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+    wait_timeout_seconds=settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS,
+    lock_timeout_seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS
+)
+
+async def run_idempotency_pruner(interval_seconds: int = settings.IDEMPOTENCY_PRUNE_INTERVAL_SECONDS) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(idempotency_store.prune)
+        except Exception as e:
+            print(f"Error pruning idempotency keys: {str(e)}")
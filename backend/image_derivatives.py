@@ -0,0 +1,121 @@
+import os
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse
+from database import SessionLocal
+from models.models import ProductImage, UserGeneratedDesign
+from models.versioning import bump_product_versions
+from cache import invalidate_products
+from config import settings
+from workers import BoundedProcessPool
+
+VARIANTS: Dict[str, Tuple[Optional[int], Optional[str]]] = {
+    "thumb": (settings.IMAGE_THUMB_SIZE, None),
+    "medium": (settings.IMAGE_MEDIUM_SIZE, None),
+    "thumb_webp": (settings.IMAGE_THUMB_SIZE, "webp"),
+    "medium_webp": (settings.IMAGE_MEDIUM_SIZE, "webp"),
+    "webp": (None, "webp"),
+}
+
+RASTER_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+VARIANT_REDIRECT_CACHE_CONTROL = "public, max-age=86400"
+
+def derivative_path(image_path: str, variant: str) -> str:
+    stem, extension = os.path.splitext(image_path)
+    _, fmt = VARIANTS[variant]
+    return f"{stem}.{variant}.{fmt or extension.lstrip('.').lower()}"
+
+def static_url(path: str) -> str:
+    return "/" + path.replace(os.sep, "/").lstrip("/")
+
+def variant_urls(image_path: Optional[str], ready: bool, fallback_prefix: str) -> Dict[str, str]:
+    return {
+        variant: static_url(derivative_path(image_path, variant)) if ready and image_path else f"{fallback_prefix}/{variant}"
+        for variant in VARIANTS
+    }
+
+def mark_derivatives_ready(image_path: str) -> None:
+    db = SessionLocal()
+    try:
+        product_ids = [product_id for (product_id,) in db.query(ProductImage.product_id).filter(
+            ProductImage.image_path == image_path,
+            ProductImage.derivatives_ready.is_(False)
+        )]
+        db.query(ProductImage).filter(ProductImage.image_path == image_path).update(
+            {"derivatives_ready": True}, synchronize_session=False
+        )
+        db.query(UserGeneratedDesign).filter(UserGeneratedDesign.generated_image_url == image_path).update(
+            {"derivatives_ready": True}, synchronize_session=False
+        )
+        bump_product_versions(db, product_ids)
+        db.commit()
+    finally:
+        db.close()
+    invalidate_products(product_ids)
+
+def derivatives_ready(db, image_path: str) -> bool:
+    return db.query(UserGeneratedDesign.id).filter(
+        UserGeneratedDesign.generated_image_url == image_path,
+        UserGeneratedDesign.derivatives_ready.is_(True)
+    ).first() is not None
+
+def variant_redirect(image_path: str, target: str) -> RedirectResponse:
+    response = RedirectResponse(static_url(target))
+    if target != image_path:
+        response.headers["Cache-Control"] = VARIANT_REDIRECT_CACHE_CONTROL
+    return response
+
+def render_derivatives(image_path: str) -> Dict[str, str]:
+    from PIL import Image
+    
+    rendered = {}
+    with Image.open(image_path) as original:
+        original.load()
+        for variant, (size, fmt) in VARIANTS.items():
+            target = derivative_path(image_path, variant)
+            if not os.path.exists(target):
+                image = original.copy()
+                if size:
+                    image.thumbnail((size, size))
+                output_format = (fmt or original.format or "PNG").upper()
+                if output_format == "JPEG":
+                    image = image.convert("RGB")
+                elif output_format == "WEBP" and image.mode not in ("RGB", "RGBA"):
+                    image = image.convert("RGBA")
+                temp_path = f"{target}.part"
+                image.save(temp_path, format=output_format, quality=settings.IMAGE_DERIVATIVE_QUALITY)
+                os.replace(temp_path, target)
+            rendered[variant] = target
+    return rendered
+
+derivative_pool = BoundedProcessPool(
+    max_workers=settings.IMAGE_DERIVATIVE_WORKERS,
+    max_pending=settings.IMAGE_DERIVATIVE_MAX_PENDING,
+    busy_detail="Image processing is busy, try again shortly"
+)
+
+async def generate_derivatives(image_path: str) -> None:
+    if not image_path.lower().endswith(RASTER_EXTENSIONS):
+        return
+    try:
+        await derivative_pool.run(render_derivatives, image_path)
+        await run_in_threadpool(mark_derivatives_ready, image_path)
+    except Exception as e:
+        print(f"Error generating image derivatives: {str(e)}")
+
+async def ensure_derivative(image_path: str, variant: str, ready: bool = False) -> str:
+    target = derivative_path(image_path, variant)
+    if not os.path.exists(target):
+        if not image_path.lower().endswith(RASTER_EXTENSIONS):
+            return image_path
+        try:
+            target = (await derivative_pool.run(render_derivatives, image_path))[variant]
+        except HTTPException:
+            return image_path
+        except Exception as e:
+            print(f"Error generating image derivatives: {str(e)}")
+            return image_path
+    if not ready:
+        await run_in_threadpool(mark_derivatives_ready, image_path)
+    return target
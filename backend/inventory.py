@@ -0,0 +1,289 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models.models import Product, StockReservation
+from config import settings
+
+_PENDING_KEY = "inventory_pending"
+
+class InventoryLedger:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._stock: Dict[int, int] = {}
+        self._reserved: Dict[int, int] = {}
+        self._generation: Dict[int, int] = {}
+        self._changes: Dict[int, int] = {}
+
+    def ensure(self, db: Session, product_ids: Iterable[int]) -> None:
+        missing = list(product_ids)
+        while True:
+            with self.lock:
+                missing = [pid for pid in missing if pid not in self._stock]
+                started = {pid: self._changes.get(pid, 0) for pid in missing}
+            if not missing:
+                return
+            now = datetime.utcnow()
+            stock = dict(db.query(Product.id, Product.stock_quantity).filter(Product.id.in_(missing)).all())
+            reserved = dict(db.query(
+                StockReservation.product_id, func.sum(StockReservation.quantity)
+            ).filter(
+                StockReservation.product_id.in_(missing),
+                StockReservation.expires_at > now
+            ).group_by(StockReservation.product_id).all())
+            with self.lock:
+                for product_id, quantity in stock.items():
+                    if product_id in self._stock or self._changes.get(product_id, 0) != started[product_id]:
+                        continue
+                    self._stock[product_id] = quantity or 0
+                    self._reserved[product_id] = int(reserved.get(product_id) or 0)
+                    self._generation[product_id] = self._generation.get(product_id, 0) + 1
+            missing = [pid for pid in missing if pid in stock]
+
+    def snapshot(self, db: Session, product_id: int) -> Optional[dict]:
+        self.ensure(db, [product_id])
+        with self.lock:
+            if product_id not in self._stock:
+                return None
+            stock = self._stock[product_id]
+            reserved = self._reserved[product_id]
+            return {
+                "product_id": product_id,
+                "stock_quantity": stock,
+                "reserved": reserved,
+                "available": max(stock - reserved, 0)
+            }
+
+    def available(self, product_id: int, own_hold: int = 0) -> int:
+        return self._stock.get(product_id, 0) - self._reserved.get(product_id, 0) + own_hold
+
+    def adjust(self, db: Session, product_id: int, stock_delta: int = 0, reserved_delta: int = 0) -> None:
+        with self.lock:
+            generation = self._generation.get(product_id) if product_id in self._stock else None
+            self._apply(product_id, stock_delta, reserved_delta)
+        db.info.setdefault(_PENDING_KEY, []).append((product_id, stock_delta, reserved_delta, generation))
+
+    def invalidate(self, db: Session, product_id: int) -> None:
+        db.info.setdefault(_PENDING_KEY, []).append((product_id, 0, 0, None))
+
+    def forget(self, product_ids: Iterable[int]) -> None:
+        with self.lock:
+            for product_id in product_ids:
+                self._changes[product_id] = self._changes.get(product_id, 0) + 1
+                self._stock.pop(product_id, None)
+                self._reserved.pop(product_id, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            for product_id in self._stock:
+                self._changes[product_id] = self._changes.get(product_id, 0) + 1
+            self._stock.clear()
+            self._reserved.clear()
+
+    def _apply(self, product_id: int, stock_delta: int, reserved_delta: int) -> None:
+        if product_id in self._stock:
+            self._stock[product_id] += stock_delta
+            self._reserved[product_id] += reserved_delta
+
+    def _confirm(self, pending: List[tuple]) -> None:
+        # A load that overlapped this commit may have read the rows before or after it; a delta
+        # that missed the loaded counters (applied to an older load, or to none) makes them stale.
+        with self.lock:
+            for product_id, _, _, generation in pending:
+                self._changes[product_id] = self._changes.get(product_id, 0) + 1
+                if product_id in self._stock and self._generation.get(product_id) != generation:
+                    self.forget([product_id])
+
+    def _revert(self, pending: List[tuple]) -> None:
+        with self.lock:
+            for product_id, stock_delta, reserved_delta, generation in reversed(pending):
+                if generation is not None and self._generation.get(product_id) == generation:
+                    self._apply(product_id, -stock_delta, -reserved_delta)
+
+inventory_ledger = InventoryLedger()
+
+@event.listens_for(Session, "after_commit")
+def _confirm_pending(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        inventory_ledger._confirm(pending)
+
+@event.listens_for(Session, "after_transaction_end")
+def _revert_pending(session, transaction):
+    if transaction.parent is None:
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending:
+            inventory_ledger._revert(pending)
+
+def _holds(db: Session, user_id: int, product_ids: Optional[Iterable[int]] = None) -> Dict[int, StockReservation]:
+    query = db.query(StockReservation).filter(StockReservation.user_id == user_id)
+    if product_ids is not None:
+        query = query.filter(StockReservation.product_id.in_(list(product_ids)))
+    return {hold.product_id: hold for hold in query}
+
+def _release_hold(db: Session, hold: StockReservation) -> None:
+    # The ledger only counts holds that were unexpired when it loaded, so an expired hold
+    # may or may not be in the counter: reload the product after commit instead of guessing.
+    if hold.expires_at > datetime.utcnow():
+        inventory_ledger.adjust(db, hold.product_id, reserved_delta=-hold.quantity)
+    else:
+        inventory_ledger.invalidate(db, hold.product_id)
+
+def _add_hold(db: Session, user_id: int, product_id: int, quantity: int, expires_at: datetime) -> None:
+    try:
+        with db.begin_nested():
+            db.add(StockReservation(
+                product_id=product_id,
+                user_id=user_id,
+                quantity=quantity,
+                expires_at=expires_at
+            ))
+    except IntegrityError:
+        hold = db.query(StockReservation).filter(
+            StockReservation.user_id == user_id,
+            StockReservation.product_id == product_id
+        ).with_for_update().one()
+        inventory_ledger.invalidate(db, product_id)
+        hold.quantity = quantity
+        hold.expires_at = expires_at
+
+def _same_hold(db: Session, hold: StockReservation):
+    return db.query(StockReservation).filter(
+        StockReservation.id == hold.id,
+        StockReservation.quantity == hold.quantity,
+        StockReservation.expires_at == hold.expires_at
+    )
+
+def _set_hold(db: Session, hold: StockReservation, quantity: int, expires_at: datetime) -> None:
+    # reserve() moved the ledger by the difference from the hold it read; if another request
+    # rewrote the row since, write ours anyway and reload the product from the DB after commit.
+    this_hold = db.query(StockReservation).filter(StockReservation.id == hold.id)
+    db.expunge(hold)
+    if quantity <= 0:
+        if _same_hold(db, hold).delete(synchronize_session=False) != 1:
+            this_hold.delete(synchronize_session=False)
+            inventory_ledger.invalidate(db, hold.product_id)
+        return
+    values = {"quantity": quantity, "expires_at": expires_at}
+    if _same_hold(db, hold).update(values, synchronize_session=False) != 1:
+        if this_hold.update(values, synchronize_session=False) != 1:
+            _add_hold(db, hold.user_id, hold.product_id, quantity, expires_at)
+        inventory_ledger.invalidate(db, hold.product_id)
+
+def _drop_hold(db: Session, hold: StockReservation) -> None:
+    db.expunge(hold)
+    if _same_hold(db, hold).delete(synchronize_session=False) == 1:
+        _release_hold(db, hold)
+    else:
+        db.query(StockReservation).filter(StockReservation.id == hold.id).delete(synchronize_session=False)
+        inventory_ledger.invalidate(db, hold.product_id)
+
+def reserve(
+    db: Session,
+    user_id: int,
+    quantities: Dict[int, int],
+    ttl_seconds: int = settings.CART_RESERVATION_TTL_SECONDS
+) -> datetime:
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    inventory_ledger.ensure(db, quantities)
+    holds = _holds(db, user_id, quantities)
+    owned = {product_id: hold.quantity for product_id, hold in holds.items() if hold.expires_at > now}
+    with inventory_ledger.lock:
+        for product_id, quantity in quantities.items():
+            if quantity > inventory_ledger.available(product_id, own_hold=owned.get(product_id, 0)):
+                raise HTTPException(status_code=400, detail="Not enough stock")
+        for product_id, quantity in quantities.items():
+            delta = max(quantity, 0) - owned.get(product_id, 0)
+            if delta:
+                inventory_ledger.adjust(db, product_id, reserved_delta=delta)
+            if product_id in holds and product_id not in owned:
+                inventory_ledger.invalidate(db, product_id)
+    for product_id, quantity in quantities.items():
+        hold = holds.get(product_id)
+        if hold:
+            _set_hold(db, hold, quantity, expires_at)
+        elif quantity > 0:
+            _add_hold(db, user_id, product_id, quantity, expires_at)
+    db.flush()
+    return expires_at
+
+def release(db: Session, user_id: int, product_ids: Optional[Iterable[int]] = None) -> None:
+    for hold in _holds(db, user_id, product_ids).values():
+        _drop_hold(db, hold)
+    db.flush()
+
+def check_available(db: Session, user_id: int, quantities: Dict[int, int]) -> Optional[int]:
+    now = datetime.utcnow()
+    inventory_ledger.ensure(db, quantities)
+    holds = _holds(db, user_id, quantities)
+    with inventory_ledger.lock:
+        for product_id, quantity in quantities.items():
+            hold = holds.get(product_id)
+            own = hold.quantity if hold and hold.expires_at > now else 0
+            if quantity > inventory_ledger.available(product_id, own_hold=own):
+                return product_id
+    return None
+
+def consume(db: Session, user_id: int, product: Product, quantity: int) -> bool:
+    now = datetime.utcnow()
+    held_by_others = select(func.coalesce(func.sum(StockReservation.quantity), 0)).where(
+        StockReservation.product_id == Product.id,
+        StockReservation.user_id != user_id,
+        StockReservation.expires_at > now
+    ).scalar_subquery()
+    result = db.execute(
+        update(Product)
+        .where(Product.id == product.id, Product.stock_quantity - held_by_others >= quantity)
+        .values(stock_quantity=Product.stock_quantity - quantity, version=Product.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    hold = _holds(db, user_id, [product.id]).get(product.id)
+    inventory_ledger.adjust(db, product.id, stock_delta=-quantity)
+    if hold:
+        _drop_hold(db, hold)
+    return True
+
+def reap_expired(db: Session, batch_size: int = settings.RESERVATION_REAPER_BATCH_SIZE) -> int:
+    reaped = 0
+    while True:
+        now = datetime.utcnow()
+        rows = db.query(StockReservation.id, StockReservation.product_id).filter(
+            StockReservation.expires_at <= now
+        ).order_by(StockReservation.expires_at).limit(batch_size).all()
+        if not rows:
+            break
+        deleted = db.query(StockReservation).filter(
+            StockReservation.id.in_([row.id for row in rows]),
+            StockReservation.expires_at <= now
+        ).delete(synchronize_session=False)
+        for product_id in {row.product_id for row in rows}:
+            inventory_ledger.invalidate(db, product_id)
+        db.commit()
+        reaped += deleted
+        if len(rows) < batch_size:
+            break
+    return reaped
+
+def _reap_once() -> int:
+    db = SessionLocal()
+    try:
+        return reap_expired(db)
+    finally:
+        db.close()
+
+async def run_reservation_reaper(interval_seconds: int = settings.RESERVATION_REAPER_INTERVAL_SECONDS) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(_reap_once)
+        except Exception as e:
+            print(f"Error reaping stock reservations: {str(e)}")
@@ -1,14 +1,39 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import os
-from database import engine, Base
+from database import SessionLocal, engine, async_engine, async_read_engine, Base
+from db_metrics import RouteScopeMiddleware
+from uploads import UploadLimitMiddleware
+from static_files import CachedStaticFiles, precompress
+from passwords import password_pool
+from image_derivatives import derivative_pool
+from revocation import revocation_list, run_revocation_pruner
+from pagination import NEXT_CURSOR_HEADER
+from models.category_tree import ensure_category_closure
+from models.order_history import ensure_order_summaries
+from models import register_listeners
+from models.schema_upgrade import ensure_schema
+from carts import refresh_all_cart_totals
+from inventory import run_reservation_reaper
+from guest_carts import run_guest_cart_pruner
+from idempotency import run_idempotency_pruner, IDEMPOTENT_REPLAYED_HEADER
+from config import settings
+from design_jobs import design_job_queue
+from design_cache import design_cache
 from routers import (
     auth_router, products_router, cart_router,
     orders_router, admin_router, ai_router
 )
 
+register_listeners()
 Base.metadata.create_all(bind=engine)
+with engine.begin() as connection:
+    if ("carts", "subtotal") in ensure_schema(connection):
+        refresh_all_cart_totals(connection)
+    ensure_category_closure(connection)
+    ensure_order_summaries(connection)
 
 app = FastAPI(
     title="Jewelry E-commerce & AI Design Platform",
@@ -16,13 +41,74 @@ app = FastAPI(
     version="1.0.0"
 )
 
+app.add_middleware(UploadLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=[origin.strip() for origin in settings.CORS_ORIGINS.split(",") if origin.strip()],
+    allow_origin_regex=settings.CORS_ORIGIN_REGEX or None,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, IDEMPOTENT_REPLAYED_HEADER],
 )
+app.add_middleware(RouteScopeMiddleware)
+
+@app.on_event("startup")
+async def start_reservation_reaper():
+    app.state.reservation_reaper = asyncio.create_task(run_reservation_reaper())
+
+@app.on_event("shutdown")
+async def stop_reservation_reaper():
+    app.state.reservation_reaper.cancel()
+
+@app.on_event("startup")
+async def start_revocation_pruner():
+    with SessionLocal() as db:
+        revocation_list.load(db)
+    app.state.revocation_pruner = asyncio.create_task(run_revocation_pruner())
+
+@app.on_event("shutdown")
+async def stop_revocation_pruner():
+    app.state.revocation_pruner.cancel()
+
+@app.on_event("startup")
+async def start_guest_cart_pruner():
+    app.state.guest_cart_pruner = asyncio.create_task(run_guest_cart_pruner())
+
+@app.on_event("shutdown")
+async def stop_guest_cart_pruner():
+    app.state.guest_cart_pruner.cancel()
+
+@app.on_event("startup")
+async def start_idempotency_pruner():
+    app.state.idempotency_pruner = asyncio.create_task(run_idempotency_pruner())
+
+@app.on_event("shutdown")
+async def stop_idempotency_pruner():
+    app.state.idempotency_pruner.cancel()
+
+@app.on_event("startup")
+async def start_design_job_queue():
+    await run_in_threadpool(design_cache.load)
+    design_job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_design_job_queue():
+    await design_job_queue.stop()
+
+@app.on_event("shutdown")
+def stop_password_pool():
+    password_pool.shutdown()
+
+@app.on_event("shutdown")
+def stop_derivative_pool():
+    derivative_pool.shutdown()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
 
 static_dir = "static"
 if not os.path.exists(static_dir):
@@ -32,7 +118,21 @@ if not os.path.exists(static_dir):
     os.makedirs(os.path.join(static_dir, "qrcodes"))
     os.makedirs(os.path.join(static_dir, "receipts"))
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+FRONTEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRONTEND_EXTENSIONS = frozenset({".html", ".js", ".css", ".png", ".jpg", ".svg", ".ico"})
+
+@app.on_event("startup")
+async def precompress_frontend():
+    await run_in_threadpool(precompress, FRONTEND_DIR, settings.STATIC_PRECOMPRESSED_DIR, False)
+
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
+app.mount("/app", CachedStaticFiles(
+    directory=FRONTEND_DIR,
+    html=True,
+    allowed_extensions=FRONTEND_EXTENSIONS,
+    recursive=False,
+    precompressed_directory=settings.STATIC_PRECOMPRESSED_DIR
+), name="frontend")
 
 app.include_router(auth_router)
 app.include_router(products_router)
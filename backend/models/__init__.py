@@ -1,11 +1,20 @@
+from sqlalchemy import event
 from .models import (
-    User, Jeweler, PaymentMethod, Category, Product, ProductImage,
-    Cart, CartItem, Order, OrderItem, UserGeneratedDesign, DesignRequest,
-    OrderStatus, DesignRequestStatus, Gender, product_categories
+    User, RevokedToken, IdempotencyKey, Jeweler, PaymentMethod, Category, Product, ProductImage,
+    Cart, CartItem, StockReservation, Order, OrderItem, OrderSummary, UserGeneratedDesign, DesignRequest,
+    OrderStatus, DesignRequestStatus, Gender, product_categories, category_closure
 )
+from . import category_tree, order_history, versioning
 
 __all__ = [
-    'User', 'Jeweler', 'PaymentMethod', 'Category', 'Product', 'ProductImage',
-    'Cart', 'CartItem', 'Order', 'OrderItem', 'UserGeneratedDesign', 'DesignRequest',
-    'OrderStatus', 'DesignRequestStatus', 'Gender', 'product_categories'
+    'User', 'RevokedToken', 'IdempotencyKey', 'Jeweler', 'PaymentMethod', 'Category', 'Product', 'ProductImage',
+    'Cart', 'CartItem', 'StockReservation', 'Order', 'OrderItem', 'OrderSummary', 'UserGeneratedDesign', 'DesignRequest',
+    'OrderStatus', 'DesignRequestStatus', 'Gender', 'product_categories', 'category_closure',
+    'register_listeners'
 ]
+
+def register_listeners() -> None:
+    for module in (category_tree, order_history, versioning):
+        for target, identifier, listener in module.LISTENERS:
+            if not event.contains(target, identifier, listener):
+                event.listen(target, identifier, listener)
@@ -0,0 +1,96 @@
+from typing import List, Optional
+from sqlalchemy import func, inspect, literal, or_, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from .models import Category, category_closure, product_categories
+
+closure = category_closure.c
+
+def subtree_ids(db: Session, category_id: int) -> List[int]:
+    rows = db.execute(select(closure.descendant_id).where(closure.ancestor_id == category_id))
+    return [row[0] for row in rows]
+
+def subtree_product_ids(category_id: int):
+    return select(product_categories.c.product_id).join(
+        category_closure, closure.descendant_id == product_categories.c.category_id
+    ).where(closure.ancestor_id == category_id)
+
+def move_subtree(connection: Connection, category_id: int, new_parent_id: Optional[int]) -> None:
+    subtree = connection.execute(
+        select(closure.descendant_id, closure.depth).where(closure.ancestor_id == category_id)
+    ).all()
+    ancestors = [
+        row[0] for row in connection.execute(
+            select(closure.ancestor_id).where(
+                closure.descendant_id == category_id,
+                closure.ancestor_id != category_id
+            )
+        )
+    ]
+    descendants = [descendant_id for descendant_id, _ in subtree]
+    if ancestors:
+        connection.execute(category_closure.delete().where(
+            closure.descendant_id.in_(descendants),
+            closure.ancestor_id.in_(ancestors)
+        ))
+    if new_parent_id is None:
+        return
+    new_ancestors = connection.execute(
+        select(closure.ancestor_id, closure.depth).where(closure.descendant_id == new_parent_id)
+    ).all()
+    rows = [
+        {"ancestor_id": ancestor_id, "descendant_id": descendant_id, "depth": up + down + 1}
+        for ancestor_id, up in new_ancestors
+        for descendant_id, down in subtree
+    ]
+    if rows:
+        connection.execute(category_closure.insert(), rows)
+
+def rebuild_category_closure(connection: Connection) -> None:
+    parents = dict(connection.execute(select(Category.id, Category.parent_id)).all())
+    rows = []
+    for category_id in parents:
+        node, depth, seen = category_id, 0, set()
+        while node is not None and node not in seen:
+            rows.append({"ancestor_id": node, "descendant_id": category_id, "depth": depth})
+            seen.add(node)
+            node = parents.get(node)
+            depth += 1
+    connection.execute(category_closure.delete())
+    if rows:
+        connection.execute(category_closure.insert(), rows)
+
+def ensure_category_closure(connection: Connection) -> None:
+    categories = connection.scalar(select(func.count()).select_from(Category.__table__))
+    self_links = connection.scalar(
+        select(func.count()).select_from(category_closure).where(closure.depth == 0)
+    )
+    if categories != self_links:
+        rebuild_category_closure(connection)
+
+def _insert_closure(mapper, connection, target):
+    connection.execute(category_closure.insert().values(
+        ancestor_id=target.id, descendant_id=target.id, depth=0
+    ))
+    if target.parent_id is not None:
+        connection.execute(category_closure.insert().from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(closure.ancestor_id, literal(target.id), closure.depth + 1).where(
+                closure.descendant_id == target.parent_id
+            )
+        ))
+
+def _update_closure(mapper, connection, target):
+    if inspect(target).attrs.parent_id.history.has_changes():
+        move_subtree(connection, target.id, target.parent_id)
+
+def _delete_closure(mapper, connection, target):
+    connection.execute(category_closure.delete().where(
+        or_(closure.ancestor_id == target.id, closure.descendant_id == target.id)
+    ))
+
+LISTENERS = (
+    (Category, "after_insert", _insert_closure),
+    (Category, "after_update", _update_closure),
+    (Category, "before_delete", _delete_closure),
+)
@@ -0,0 +1,11 @@
+from sqlalchemy.orm import selectinload
+from .models import Product, Order
+
+PRODUCT_LOAD_OPTIONS = (
+    selectinload(Product.images),
+    selectinload(Product.categories),
+)
+
+ORDER_LOAD_OPTIONS = (
+    selectinload(Order.items),
+)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Enum, JSON, Boolean, Table
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Enum, JSON, Boolean, Table, Index
 from sqlalchemy.orm import relationship
 from database import Base
 import enum
@@ -29,7 +29,17 @@ product_categories = Table(
     'product_categories',
     Base.metadata,
     Column('product_id', Integer, ForeignKey('products.id'), primary_key=True),
-    Column('category_id', Integer, ForeignKey('categories.id'), primary_key=True)
+    Column('category_id', Integer, ForeignKey('categories.id'), primary_key=True),
+    Index('ix_product_categories_category_id', 'category_id', 'product_id')
+)
+
+category_closure = Table(
+    'category_closure',
+    Base.metadata,
+    Column('ancestor_id', Integer, ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True),
+    Column('descendant_id', Integer, ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True),
+    Column('depth', Integer, nullable=False, default=0),
+    Index('ix_category_closure_descendant_id', 'descendant_id', 'depth')
 )
 
 class User(Base):
@@ -47,11 +57,38 @@ class User(Base):
     address = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
+    
     cart = relationship("Cart", back_populates="user", uselist=False)
     orders = relationship("Order", back_populates="user")
     generated_designs = relationship("UserGeneratedDesign", back_populates="user")
     design_requests = relationship("DesignRequest", back_populates="user")
 
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(32), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow)
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    locked_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    __table_args__ = (
+        Index('ix_idempotency_keys_user_key', 'user_id', 'key', unique=True),
+    )
+
 class Jeweler(Base):
     __tablename__ = "jewelers"
     
@@ -65,6 +102,10 @@ class Jeweler(Base):
     rating = Column(Float, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        Index('ix_jewelers_created_at_id', 'created_at', 'id'),
+    )
+    
     products = relationship("Product", back_populates="jeweler")
     design_requests = relationship("DesignRequest", back_populates="jeweler")
 
@@ -85,6 +126,7 @@ class Category(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     parent_id = Column(Integer, ForeignKey('categories.id'), nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     parent = relationship("Category", remote_side=[id], backref="subcategories")
     products = relationship("Product", secondary=product_categories, back_populates="categories")
@@ -102,6 +144,7 @@ class Product(Base):
     stock_quantity = Column(Integer, default=0)
     description = Column(Text)
     image_path = Column(String(255))
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     jeweler = relationship("Jeweler", back_populates="products")
     categories = relationship("Category", secondary=product_categories, back_populates="products")
@@ -116,6 +159,7 @@ class ProductImage(Base):
     product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
     image_path = Column(String(255), nullable=False)
     display_order = Column(Integer, default=0)
+    derivatives_ready = Column(Boolean, nullable=False, default=False, server_default="0")
     
     product = relationship("Product", back_populates="images")
 
@@ -124,6 +168,8 @@ class Cart(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id'), unique=True, nullable=False)
+    subtotal = Column(Float, nullable=False, default=0, server_default="0")
+    item_count = Column(Integer, nullable=False, default=0, server_default="0")
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     user = relationship("User", back_populates="cart")
@@ -140,6 +186,21 @@ class CartItem(Base):
     cart = relationship("Cart", back_populates="items")
     product = relationship("Product", back_populates="cart_items")
 
+class StockReservation(Base):
+    __tablename__ = "stock_reservations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='CASCADE'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    __table_args__ = (
+        Index('ix_stock_reservations_user_product', 'user_id', 'product_id', unique=True),
+        Index('ix_stock_reservations_product_expires', 'product_id', 'expires_at'),
+    )
+
 class Order(Base):
     __tablename__ = "orders"
     
@@ -152,6 +213,11 @@ class Order(Base):
     shipping_address = Column(Text)
     transfer_receipt = Column(String(255))
     
+    __table_args__ = (
+        Index('ix_orders_order_date_id', 'order_date', 'id'),
+        Index('ix_orders_status_order_date_id', 'status', 'order_date', 'id'),
+    )
+    
     user = relationship("User", back_populates="orders")
     payment_method = relationship("PaymentMethod", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
@@ -169,6 +235,21 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
 
+class OrderSummary(Base):
+    __tablename__ = "order_summaries"
+    
+    order_id = Column(Integer, ForeignKey('orders.id', ondelete='CASCADE'), primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    order_date = Column(DateTime, nullable=False)
+    status = Column(Enum(OrderStatus), nullable=False)
+    total_amount = Column(Float, nullable=False)
+    item_count = Column(Integer, nullable=False, default=0)
+    thumbnail_path = Column(String(255))
+    
+    __table_args__ = (
+        Index('ix_order_summaries_user_date', 'user_id', 'order_date', 'order_id'),
+    )
+
 class UserGeneratedDesign(Base):
     __tablename__ = "user_generated_designs"
     
@@ -176,6 +257,7 @@ class UserGeneratedDesign(Base):
     user_id = Column(Integer, ForeignKey('users.id'), nullable=True)
     selected_options = Column(JSON)
     generated_image_url = Column(String(255))
+    derivatives_ready = Column(Boolean, nullable=False, default=False, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="generated_designs")
@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import Dict, Iterable, Sequence, Tuple
+from sqlalchemy import func, insert, inspect, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from .models import Order, OrderItem, OrderStatus, OrderSummary, Product, ProductImage
+
+BACKFILL_BATCH_SIZE = 500
+
+def product_thumbnails(db, product_ids: Iterable[int]) -> Dict[int, str]:
+    product_ids = [product_id for product_id in set(product_ids) if product_id is not None]
+    if not product_ids:
+        return {}
+    thumbnails = {
+        product_id: image_path
+        for product_id, image_path in db.execute(
+            select(Product.id, Product.image_path).where(Product.id.in_(product_ids))
+        )
+        if image_path
+    }
+    missing = [product_id for product_id in product_ids if product_id not in thumbnails]
+    if missing:
+        for product_id, image_path in db.execute(
+            select(ProductImage.product_id, ProductImage.image_path)
+            .where(ProductImage.product_id.in_(missing))
+            .order_by(ProductImage.product_id, ProductImage.display_order, ProductImage.id)
+        ):
+            thumbnails.setdefault(product_id, image_path)
+    return thumbnails
+
+def record_order_summary(db: Session, order: Order, lines: Sequence[Tuple[int, int]]) -> None:
+    first_product_id = lines[0][0] if lines else None
+    db.add(OrderSummary(
+        order_id=order.id,
+        user_id=order.user_id,
+        order_date=order.order_date,
+        status=order.status or OrderStatus.pending,
+        total_amount=order.total_amount,
+        item_count=sum(quantity for _, quantity in lines),
+        thumbnail_path=product_thumbnails(db, [first_product_id]).get(first_product_id)
+    ))
+
+def ensure_order_summaries(connection: Connection) -> None:
+    while True:
+        orders = connection.execute(
+            select(Order.id, Order.user_id, Order.order_date, Order.status, Order.total_amount)
+            .outerjoin(OrderSummary, OrderSummary.order_id == Order.id)
+            .where(OrderSummary.order_id.is_(None))
+            .order_by(Order.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not orders:
+            return
+        order_ids = [order.id for order in orders]
+        counts = dict(connection.execute(
+            select(OrderItem.order_id, func.sum(OrderItem.quantity))
+            .where(OrderItem.order_id.in_(order_ids))
+            .group_by(OrderItem.order_id)
+        ).all())
+        first_products = dict(connection.execute(
+            select(OrderItem.order_id, OrderItem.product_id).where(OrderItem.id.in_(
+                select(func.min(OrderItem.id))
+                .where(OrderItem.order_id.in_(order_ids))
+                .group_by(OrderItem.order_id)
+            ))
+        ).all())
+        thumbnails = product_thumbnails(connection, first_products.values())
+        connection.execute(insert(OrderSummary), [
+            {
+                "order_id": order.id,
+                "user_id": order.user_id,
+                "order_date": order.order_date or datetime.utcnow(),
+                "status": order.status or OrderStatus.pending,
+                "total_amount": order.total_amount,
+                "item_count": counts.get(order.id) or 0,
+                "thumbnail_path": thumbnails.get(first_products.get(order.id))
+            }
+            for order in orders
+        ])
+
+def _sync_summary_status(mapper, connection, target):
+    if inspect(target).attrs.status.history.has_changes():
+        connection.execute(
+            update(OrderSummary)
+            .where(OrderSummary.order_id == target.id)
+            .values(status=target.status)
+        )
+
+LISTENERS = (
+    (Order, "after_update", _sync_summary_status),
+)
@@ -0,0 +1,30 @@
+from typing import Set, Tuple
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+from .models import Base
+
+def ensure_schema(connection: Connection) -> Set[Tuple[str, str]]:
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    added = set()
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in columns:
+                continue
+            if not column.nullable and column.server_default is None:
+                raise RuntimeError(
+                    f"Cannot add NOT NULL column {table.name}.{column.name} without a server default"
+                )
+            ddl = CreateColumn(column).compile(dialect=connection.dialect)
+            table_name = connection.dialect.identifier_preparer.format_table(table)
+            connection.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {ddl}")
+            added.add((table.name, column.name))
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(connection)
+    return added
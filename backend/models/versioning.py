@@ -0,0 +1,30 @@
+from typing import Iterable
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from .models import Category, Product, ProductImage
+
+VERSIONED_MODELS = (Product, Category)
+
+def bump_product_versions(db: Session, product_ids: Iterable[int]) -> None:
+    product_ids = list(set(product_ids))
+    if product_ids:
+        db.execute(
+            update(Product)
+            .where(Product.id.in_(product_ids))
+            .values(version=Product.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+def _bump_versions(session, flush_context, instances):
+    for obj in session.dirty:
+        if isinstance(obj, VERSIONED_MODELS) and session.is_modified(obj):
+            obj.version = type(obj).version + 1
+    image_owners = {
+        obj.product_id for obj in list(session.new) + list(session.deleted)
+        if isinstance(obj, ProductImage) and obj.product_id is not None
+    }
+    bump_product_versions(session, image_owners)
+
+LISTENERS = (
+    (Session, "before_flush", _bump_versions),
+)
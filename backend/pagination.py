@@ -0,0 +1,95 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional, Sequence
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(values: Sequence) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _cursor_value(value, column):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise TypeError("cursor value is not a timestamp")
+        return datetime.fromisoformat(value)
+    if isinstance(value, bool) or value is None:
+        raise TypeError("cursor value has the wrong type")
+    if python_type is int:
+        if not isinstance(value, int):
+            raise TypeError("cursor value is not an integer")
+        return value
+    if python_type in (float, Decimal):
+        if not isinstance(value, (int, float, str)):
+            raise TypeError("cursor value is not a number")
+        return python_type(value)
+    if python_type is str and not isinstance(value, str):
+        raise TypeError("cursor value is not a string")
+    return value
+
+def decode_cursor(token: str, columns: Sequence) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError("cursor does not match sort key")
+        return [_cursor_value(value, column) for value, column in zip(payload, columns)]
+    except (ArithmeticError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _after_clause(columns: Sequence, values: Sequence, descending: bool):
+    clauses = []
+    for i, column in enumerate(columns):
+        past = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*[columns[j] == values[j] for j in range(i)], past))
+    return or_(*clauses)
+
+def _keyset_query(query, columns: Sequence, after: Optional[str], skip: int, descending: bool):
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    if after:
+        query = query.filter(_after_clause(columns, decode_cursor(after, columns), descending))
+    elif skip:
+        query = query.offset(skip)
+    return query
+
+def _set_next_cursor(rows: Sequence, columns: Sequence, limit: int, response: Optional[Response]) -> None:
+    if response is not None and rows and len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            [getattr(rows[-1], c.key) for c in columns]
+        )
+
+def keyset_paginate(
+    query,
+    columns: Sequence,
+    limit: int,
+    after: Optional[str] = None,
+    skip: int = 0,
+    descending: bool = False,
+    response: Optional[Response] = None
+) -> list:
+    rows = _keyset_query(query, columns, after, skip, descending).limit(limit).all()
+    _set_next_cursor(rows, columns, limit, response)
+    return rows
+
+async def keyset_paginate_async(
+    db: AsyncSession,
+    statement,
+    columns: Sequence,
+    limit: int,
+    after: Optional[str] = None,
+    skip: int = 0,
+    descending: bool = False,
+    response: Optional[Response] = None,
+    scalars: bool = True
+) -> list:
+    result = await db.execute(_keyset_query(statement, columns, after, skip, descending).limit(limit))
+    rows = result.scalars().all() if scalars else result.all()
+    _set_next_cursor(rows, columns, limit, response)
+    return rows
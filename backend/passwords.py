@@ -0,0 +1,23 @@
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+from config import settings
+from workers import BoundedProcessPool
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+password_pool = BoundedProcessPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    busy_detail="Too many authentication requests, try again shortly",
+    niceness=settings.PASSWORD_HASH_NICENESS
+)
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from datetime import datetime
+from typing import Dict
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from database import AsyncSessionLocal
+from models.models import RevokedToken
+from config import settings
+
+class RevocationList:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, datetime] = {}
+
+    def load(self, db: Session) -> None:
+        now = datetime.utcnow()
+        db.query(RevokedToken).filter(RevokedToken.expires_at <= now).delete(synchronize_session=False)
+        db.commit()
+        rows = db.query(RevokedToken.jti, RevokedToken.expires_at).all()
+        with self._lock:
+            self._entries = {jti: expires_at for jti, expires_at in rows}
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._entries
+
+    async def is_revoked_async(self, db: AsyncSession, jti: str) -> bool:
+        if jti in self._entries:
+            return True
+        result = await db.execute(select(RevokedToken.expires_at).where(RevokedToken.jti == jti))
+        expires_at = result.scalar_one_or_none()
+        if expires_at is None:
+            return False
+        self._remember(jti, expires_at)
+        return True
+
+    async def revoke(self, db: AsyncSession, jti: str, expires_at: datetime) -> bool:
+        if jti in self._entries:
+            return False
+        try:
+            await db.execute(insert(RevokedToken).values(jti=jti, expires_at=expires_at))
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            self._remember(jti, expires_at)
+            return False
+        self._remember(jti, expires_at)
+        return True
+
+    async def prune(self, db: AsyncSession) -> int:
+        now = datetime.utcnow()
+        await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        await db.commit()
+        rows = (await db.execute(select(RevokedToken.jti, RevokedToken.expires_at))).all()
+        with self._lock:
+            expired = [jti for jti, expires_at in self._entries.items() if expires_at <= now]
+            for jti in expired:
+                del self._entries[jti]
+            self._entries.update({jti: expires_at for jti, expires_at in rows})
+        return len(expired)
+
+    def _remember(self, jti: str, expires_at: datetime) -> None:
+        with self._lock:
+            self._entries[jti] = expires_at
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+revocation_list = RevocationList()
+
+async def run_revocation_pruner(interval_seconds: int = settings.REVOCATION_PRUNE_INTERVAL_SECONDS) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with AsyncSessionLocal() as db:
+                await revocation_list.prune(db)
+        except Exception as e:
+            print(f"Error pruning revoked tokens: {str(e)}")
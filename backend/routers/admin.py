@@ -1,12 +1,23 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from database import get_db
+from database import get_db, get_read_db
 from models.models import (
     Jeweler, Product, Category, PaymentMethod, Order,
     DesignRequest, User, OrderStatus, DesignRequestStatus
 )
+from models.loaders import ORDER_LOAD_OPTIONS
+from pagination import keyset_paginate
+from cache import catalog_cache, JEWELERS_KEY
+from facets import facet_index
+from db_metrics import pool_metrics
+from passwords import password_pool
+from design_jobs import design_job_queue
+from design_cache import design_cache
+from guest_carts import guest_cart_store
+from idempotency import idempotency_store
+from image_derivatives import derivative_pool
 from schemas import (
     JewelerCreate, JewelerUpdate, JewelerResponse,
     PaymentMethodCreate, PaymentMethodUpdate, PaymentMethodResponse,
@@ -24,12 +35,23 @@ def create_jeweler(jeweler: JewelerCreate, db: Session = Depends(get_db)):
     new_jeweler = Jeweler(**jeweler.dict())
     db.add(new_jeweler)
     db.commit()
+    catalog_cache.invalidate(JEWELERS_KEY)
+    facet_index.invalidate()
     db.refresh(new_jeweler)
     return new_jeweler
 
 @router.get("/jewelers", response_model=List[JewelerResponse])
-def get_jewelers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(Jeweler).offset(skip).limit(limit).all()
+def get_jewelers(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    return keyset_paginate(
+        db.query(Jeweler), [Jeweler.created_at, Jeweler.id], limit,
+        after=after, skip=skip, response=response
+    )
 
 @router.get("/jewelers/{jeweler_id}", response_model=JewelerResponse)
 def get_jeweler(jeweler_id: int, db: Session = Depends(get_db)):
@@ -49,6 +71,8 @@ def update_jeweler(jeweler_id: int, jeweler: JewelerUpdate, db: Session = Depend
         setattr(db_jeweler, key, value)
     
     db.commit()
+    catalog_cache.invalidate(JEWELERS_KEY)
+    facet_index.invalidate()
     db.refresh(db_jeweler)
     return db_jeweler
 
@@ -59,6 +83,8 @@ def delete_jeweler(jeweler_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Jeweler not found")
     db.delete(db_jeweler)
     db.commit()
+    catalog_cache.invalidate(JEWELERS_KEY)
+    facet_index.invalidate()
     return None
 
 @router.post("/payment-methods", response_model=PaymentMethodResponse, status_code=status.HTTP_201_CREATED)
@@ -98,15 +124,20 @@ def delete_payment_method(method_id: int, db: Session = Depends(get_db)):
 
 @router.get("/orders", response_model=List[OrderResponse])
 def get_all_orders(
+    response: Response,
     status_filter: OrderStatus = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    after: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    query = db.query(Order)
+    query = db.query(Order).options(*ORDER_LOAD_OPTIONS)
     if status_filter:
         query = query.filter(Order.status == status_filter)
-    return query.offset(skip).limit(limit).all()
+    return keyset_paginate(
+        query, [Order.order_date, Order.id], limit,
+        after=after, skip=skip, descending=True, response=response
+    )
 
 @router.put("/orders/{order_id}/status", response_model=OrderResponse)
 def update_order_status(
@@ -155,12 +186,58 @@ def update_design_request(
     return design_request
 
 @router.get("/users", response_model=List[dict])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = db.query(User).offset(skip).limit(limit).all()
+def get_users(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    users = keyset_paginate(
+        db.query(User), [User.created_at, User.id], limit,
+        after=after, skip=skip, response=response
+    )
     return [{"id": u.id, "username": u.username, "email": u.email, "created_at": u.created_at} for u in users]
 
+@router.get("/cache/stats")
+def get_cache_stats():
+    return catalog_cache.stats()
+
+@router.get("/cache/designs/stats")
+def get_design_cache_stats():
+    return design_cache.stats()
+
+@router.get("/cache/guest-carts/stats")
+def get_guest_cart_stats():
+    return guest_cart_store.stats()
+
+@router.get("/metrics/idempotency")
+def get_idempotency_metrics():
+    return idempotency_store.stats()
+
+@router.get("/metrics/db")
+def get_db_metrics():
+    return pool_metrics.snapshot()
+
+@router.get("/metrics/auth")
+def get_auth_metrics():
+    return password_pool.stats()
+
+@router.get("/metrics/images")
+def get_image_metrics():
+    return derivative_pool.stats()
+
+@router.get("/metrics/ai-jobs")
+def get_ai_job_metrics():
+    return design_job_queue.stats()
+
+@router.delete("/metrics/db", status_code=status.HTTP_204_NO_CONTENT)
+def reset_db_metrics():
+    pool_metrics.reset()
+    return None
+
 @router.get("/dashboard/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
+def get_dashboard_stats(db: Session = Depends(get_read_db)):
     total_users = db.query(User).count()
     total_jewelers = db.query(Jeweler).count()
     total_products = db.query(Product).count()
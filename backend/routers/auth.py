@@ -1,28 +1,34 @@
-from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models.models import User
-from schemas.user import UserCreate, UserResponse, Token
+from schemas.user import UserCreate, UserResponse, Token, RefreshRequest, Principal
 from auth import (
-    get_password_hash, authenticate_user, create_access_token, get_current_active_user
+    get_password_hash_async, authenticate_user_async, issue_tokens, decode_token, decode_refresh_token, revoke_token,
+    oauth2_scheme,
+    get_current_active_user, get_current_user, invalidate_principal
 )
+from carts import merge_guest_cart_now
 from config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.username == user.username).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = (await db.execute(select(User).where(User.username == user.username))).scalars().first()
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    db_email = db.query(User).filter(User.email == user.email).first()
+    db_email = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
     if db_email:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    await db.rollback()
+    hashed_password = await get_password_hash_async(user.password)
     new_user = User(
         username=user.username,
         email=user.email,
@@ -35,38 +41,72 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         address=user.address
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(
+    request: Request,
+    response: Response,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    guest_cart_id = request.cookies.get(settings.GUEST_CART_COOKIE)
+    if guest_cart_id:
+        try:
+            if await run_in_threadpool(merge_guest_cart_now, user.id, guest_cart_id):
+                response.delete_cookie(settings.GUEST_CART_COOKIE, path="/api")
+        except HTTPException:
+            pass
+    return issue_tokens(user.id, user.username)
+
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    payload = await decode_refresh_token(db, request.refresh_token)
+    if not await revoke_token(db, payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token already used",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return issue_tokens(payload["uid"], payload["sub"])
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    request: Optional[RefreshRequest] = None,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    await revoke_token(db, decode_token(token))
+    if request is not None:
+        await revoke_token(db, await decode_refresh_token(db, request.refresh_token))
+    return None
 
 @router.get("/me", response_model=UserResponse)
-def read_users_me(current_user: User = Depends(get_current_active_user)):
+async def read_users_me(current_user: UserResponse = Depends(get_current_user)):
     return current_user
 
 @router.put("/me", response_model=UserResponse)
-def update_user_me(
+async def update_user_me(
     update_data: dict,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    principal: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    current_user = await db.get(User, principal.id)
+    if current_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
     for key, value in update_data.items():
         if value is not None and hasattr(current_user, key):
             setattr(current_user, key, value)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    invalidate_principal(principal.id)
+    await db.refresh(current_user)
     return current_user
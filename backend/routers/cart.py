@@ -1,59 +1,135 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
-from models.models import Cart, CartItem, Product, User
-from schemas import CartItemCreate, CartItemUpdate, CartResponse
+from database import get_db, get_read_db, get_async_db
+from models.models import Cart, CartItem, Product
+from schemas import (
+    CartItemCreate, CartItemUpdate, CartBatchUpdate, CartResponse, CartSummaryResponse,
+    GuestCartResponse, Principal
+)
 from auth import get_current_active_user
+from inventory import reserve, release
+from carts import (
+    refresh_cart_totals, get_or_create_cart, apply_operations, apply_cart_operations, merge_guest_cart,
+    cart_rows_statement, cart_summary_statement, guest_products_statement,
+    build_cart_response, build_cart_summary, build_guest_cart_response, check_guest_lines
+)
+from guest_carts import guest_cart_store
+from config import settings
 
 router = APIRouter(prefix="/api/cart", tags=["Cart"])
 
 @router.get("/", response_model=CartResponse)
-def get_cart(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+async def get_cart(
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    result = await db.execute(cart_rows_statement(current_user.id))
+    cart = build_cart_response(current_user.id, result.all())
     if not cart:
-        cart = Cart(user_id=current_user.id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
+        new_cart = Cart(user_id=current_user.id)
+        db.add(new_cart)
+        await db.commit()
+        cart = CartResponse(id=new_cart.id, user_id=new_cart.user_id, updated_at=new_cart.updated_at)
+    return cart
+
+@router.get("/summary", response_model=CartSummaryResponse)
+async def get_cart_summary(
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(cart_summary_statement(current_user.id))
+    return build_cart_summary(result.first())
+
+@router.patch("/", response_model=CartResponse)
+def update_cart(
+    batch: CartBatchUpdate,
+    current_user: Principal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    apply_cart_operations(db, current_user.id, batch.operations)
+    db.commit()
+    return build_cart_response(current_user.id, db.execute(cart_rows_statement(current_user.id)).all())
+
+@router.get("/guest", response_model=GuestCartResponse)
+def get_guest_cart(request: Request, db: Session = Depends(get_read_db)):
+    guest_cart_id = request.cookies.get(settings.GUEST_CART_COOKIE)
+    lines = guest_cart_store.get(guest_cart_id) if guest_cart_id else {}
+    products = {row.id: row for row in db.execute(guest_products_statement(lines))} if lines else {}
+    return build_guest_cart_response(lines, products)
+
+@router.patch("/guest", response_model=GuestCartResponse)
+def update_guest_cart(
+    batch: CartBatchUpdate,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db)
+):
+    guest_cart_id = request.cookies.get(settings.GUEST_CART_COOKIE) or guest_cart_store.new_id()
+    lines = guest_cart_store.get(guest_cart_id)
+    touched = apply_operations(lines, batch.operations)
+    if len(lines) > settings.GUEST_CART_MAX_LINES:
+        raise HTTPException(status_code=400, detail="Too many items in cart")
+    products = {row.id: row for row in db.execute(guest_products_statement(lines))} if lines else {}
+    check_guest_lines(lines, touched, products)
     
-    total = sum(item.product.price * item.quantity for item in cart.items)
-    return CartResponse(
-        id=cart.id,
-        user_id=cart.user_id,
-        updated_at=cart.updated_at,
-        items=cart.items,
-        total=total
+    guest_cart_store.set(guest_cart_id, lines)
+    response.set_cookie(
+        settings.GUEST_CART_COOKIE,
+        guest_cart_id,
+        max_age=settings.GUEST_CART_TTL_SECONDS,
+        path="/api",
+        httponly=True,
+        samesite="lax"
     )
+    return build_guest_cart_response(lines, products)
+
+@router.delete("/guest", status_code=status.HTTP_204_NO_CONTENT)
+def clear_guest_cart(request: Request, response: Response):
+    guest_cart_id = request.cookies.get(settings.GUEST_CART_COOKIE)
+    if guest_cart_id:
+        guest_cart_store.delete(guest_cart_id)
+    response.delete_cookie(settings.GUEST_CART_COOKIE, path="/api")
+    return None
+
+@router.post("/merge", response_model=CartResponse)
+def merge_cart(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    guest_cart_id = request.cookies.get(settings.GUEST_CART_COOKIE)
+    merged = merge_guest_cart(db, current_user.id, guest_cart_id)
+    if not merged:
+        get_or_create_cart(db, current_user.id)
+    db.commit()
+    if merged:
+        guest_cart_store.delete(guest_cart_id)
+    response.delete_cookie(settings.GUEST_CART_COOKIE, path="/api")
+    return build_cart_response(current_user.id, db.execute(cart_rows_statement(current_user.id)).all())
 
 @router.post("/items", status_code=status.HTTP_201_CREATED)
 def add_to_cart(
     item: CartItemCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     product = db.query(Product).filter(Product.id == item.product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    if product.stock_quantity < item.quantity:
-        raise HTTPException(status_code=400, detail="Not enough stock")
-    
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
-    if not cart:
-        cart = Cart(user_id=current_user.id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
+    cart = get_or_create_cart(db, current_user.id)
     
     existing_item = db.query(CartItem).filter(
         CartItem.cart_id == cart.id,
         CartItem.product_id == item.product_id
     ).first()
     
+    held = existing_item.quantity if existing_item else 0
+    reserve(db, current_user.id, {item.product_id: held + item.quantity})
+    
     if existing_item:
         existing_item.quantity += item.quantity
     else:
@@ -64,6 +140,7 @@ def add_to_cart(
         )
         db.add(cart_item)
     
+    refresh_cart_totals(db, [cart.id])
     db.commit()
     return {"message": "Item added to cart"}
 
@@ -71,7 +148,7 @@ def add_to_cart(
 def update_cart_item(
     item_id: int,
     item: CartItemUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
@@ -86,17 +163,17 @@ def update_cart_item(
     if not cart_item:
         raise HTTPException(status_code=404, detail="Cart item not found")
     
-    if cart_item.product.stock_quantity < item.quantity:
-        raise HTTPException(status_code=400, detail="Not enough stock")
+    reserve(db, current_user.id, {cart_item.product_id: item.quantity})
     
     cart_item.quantity = item.quantity
+    refresh_cart_totals(db, [cart.id])
     db.commit()
     return {"message": "Cart item updated"}
 
 @router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 def remove_from_cart(
     item_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
@@ -111,17 +188,21 @@ def remove_from_cart(
     if not cart_item:
         raise HTTPException(status_code=404, detail="Cart item not found")
     
+    release(db, current_user.id, [cart_item.product_id])
     db.delete(cart_item)
+    refresh_cart_totals(db, [cart.id])
     db.commit()
     return None
 
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
 def clear_cart(
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
     if cart:
         db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+        release(db, current_user.id)
+        refresh_cart_totals(db, [cart.id])
         db.commit()
     return None
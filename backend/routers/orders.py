@@ -1,50 +1,123 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status, UploadFile, File
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import os
-import uuid
-from database import get_db
-from models.models import Order, OrderItem, Cart, CartItem, PaymentMethod, User, OrderStatus
-from schemas import OrderCreate, OrderResponse, OrderUpdate
+from database import get_db, get_async_db
+from models.models import Order, OrderItem, OrderSummary, Cart, CartItem, PaymentMethod, Product, OrderStatus
+from models.loaders import ORDER_LOAD_OPTIONS
+from models.order_history import record_order_summary
+from pagination import keyset_paginate_async
+from schemas import OrderCreate, OrderResponse, OrderSummaryResponse, OrderUpdate, Principal
 from auth import get_current_active_user
+from cache import invalidate_products
+from inventory import reserve, check_available, consume
+from carts import refresh_cart_totals, merge_guest_cart
+from guest_carts import guest_cart_store
+from idempotency import idempotency_store, request_fingerprint, IDEMPOTENCY_KEY_HEADER
+from config import settings
+from uploads import store_upload, RECEIPT_TYPES
 
 router = APIRouter(prefix="/api/orders", tags=["Orders"])
 
 UPLOAD_DIR = "static/receipts"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-@router.get("/", response_model=List[OrderResponse])
-def get_orders(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+@router.get("/", response_model=List[OrderSummaryResponse])
+async def get_orders(
+    response: Response,
+    skip: int = 0,
+    limit: int = 20,
+    after: Optional[str] = None,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    orders = db.query(Order).filter(Order.user_id == current_user.id).all()
-    return orders
+    query = select(OrderSummary).where(OrderSummary.user_id == current_user.id)
+    return await keyset_paginate_async(
+        db, query, [OrderSummary.order_date, OrderSummary.order_id], limit,
+        after=after, skip=skip, descending=True, response=response
+    )
 
 @router.get("/{order_id}", response_model=OrderResponse)
-def get_order(
+async def get_order(
     order_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    order = db.query(Order).filter(
+    result = await db.execute(select(Order).options(*ORDER_LOAD_OPTIONS).where(
         Order.id == order_id,
         Order.user_id == current_user.id
-    ).first()
+    ))
+    order = result.scalars().first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
+def _cart_quantities(db: Session, cart_id: int) -> dict:
+    quantities = {}
+    for product_id, quantity in db.query(CartItem.product_id, CartItem.quantity).filter(
+        CartItem.cart_id == cart_id
+    ):
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+@router.post("/checkout")
+def start_checkout(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    guest_cart_id = request.cookies.get(settings.GUEST_CART_COOKIE)
+    merged = merge_guest_cart(db, current_user.id, guest_cart_id)
+    
+    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    quantities = _cart_quantities(db, cart.id) if cart else {}
+    if not quantities:
+        raise HTTPException(status_code=400, detail="Cart is empty")
+    
+    expires_at = reserve(
+        db, current_user.id, quantities,
+        ttl_seconds=settings.CHECKOUT_RESERVATION_TTL_SECONDS
+    )
+    db.commit()
+    if merged:
+        guest_cart_store.delete(guest_cart_id)
+        response.delete_cookie(settings.GUEST_CART_COOKIE, path="/api")
+    return {"message": "Stock reserved for checkout", "expires_at": expires_at}
+
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 def create_order(
     order: OrderCreate,
-    current_user: User = Depends(get_current_active_user),
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
-    if not cart or not cart.items:
-        raise HTTPException(status_code=400, detail="Cart is empty")
+    if not idempotency_key:
+        return _place_order(db, current_user, order, request, response)
     
+    replay = idempotency_store.claim(current_user.id, idempotency_key, request_fingerprint(order))
+    if replay is not None:
+        return replay
+    completed = False
+    try:
+        new_order = _place_order(db, current_user, order, request, response, idempotency_key)
+        completed = True
+        return new_order
+    finally:
+        idempotency_store.release(current_user.id, idempotency_key, completed)
+
+def _place_order(
+    db: Session,
+    current_user: Principal,
+    order: OrderCreate,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = None
+) -> Order:
     payment_method = db.query(PaymentMethod).filter(
         PaymentMethod.id == order.payment_method_id,
         PaymentMethod.is_active == True
@@ -52,54 +125,98 @@ def create_order(
     if not payment_method:
         raise HTTPException(status_code=404, detail="Payment method not found or inactive")
     
-    for item in cart.items:
-        if item.product.stock_quantity < item.quantity:
+    guest_cart_id = request.cookies.get(settings.GUEST_CART_COOKIE)
+    merged = merge_guest_cart(db, current_user.id, guest_cart_id)
+    
+    cart = db.query(Cart).filter(Cart.user_id == current_user.id).with_for_update().first()
+    if not cart:
+        raise HTTPException(status_code=400, detail="Cart is empty")
+    
+    quantities = _cart_quantities(db, cart.id)
+    if not quantities:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Cart is empty")
+    
+    short_product_id = check_available(db, current_user.id, quantities)
+    if short_product_id is not None:
+        db.rollback()
+        product = db.query(Product).filter(Product.id == short_product_id).first()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Not enough stock for product: {product.name if product else short_product_id}"
+        )
+    
+    products = db.query(Product).filter(
+        Product.id.in_(quantities)
+    ).order_by(Product.id).with_for_update().all()
+    
+    for product in products:
+        if product.stock_quantity < quantities[product.id]:
+            db.rollback()
             raise HTTPException(
                 status_code=400,
-                detail=f"Not enough stock for product: {item.product.name}"
+                detail=f"Not enough stock for product: {product.name}"
             )
     
-    total_amount = sum(item.product.price * item.quantity for item in cart.items)
+    for product in products:
+        if not consume(db, current_user.id, product, quantities[product.id]):
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail=f"Not enough stock for product: {product.name}"
+            )
     
     new_order = Order(
         user_id=current_user.id,
         payment_method_id=order.payment_method_id,
-        total_amount=total_amount,
+        total_amount=sum(product.price * quantities[product.id] for product in products),
         shipping_address=order.shipping_address,
         transfer_receipt=order.transfer_receipt
     )
     db.add(new_order)
     db.flush()
     
-    for item in cart.items:
-        order_item = OrderItem(
-            order_id=new_order.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            unit_price=item.product.price,
-            subtotal=item.product.price * item.quantity
-        )
-        db.add(order_item)
-        
-        item.product.stock_quantity -= item.quantity
+    db.execute(insert(OrderItem), [
+        {
+            "order_id": new_order.id,
+            "product_id": product.id,
+            "quantity": quantities[product.id],
+            "unit_price": product.price,
+            "subtotal": product.price * quantities[product.id]
+        }
+        for product in products
+    ])
+    record_order_summary(db, new_order, [(product.id, quantities[product.id]) for product in products])
+    db.query(CartItem).filter(CartItem.cart_id == cart.id).delete(synchronize_session=False)
+    refresh_cart_totals(db, [cart.id])
     
-    db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+    if idempotency_key:
+        db.refresh(new_order)
+        idempotency_store.record(
+            db, current_user.id, idempotency_key,
+            status.HTTP_201_CREATED, OrderResponse.model_validate(new_order)
+        )
     
     db.commit()
+    if merged:
+        guest_cart_store.delete(guest_cart_id)
+        response.delete_cookie(settings.GUEST_CART_COOKIE, path="/api")
+    invalidate_products(quantities)
     db.refresh(new_order)
     return new_order
 
 @router.put("/{order_id}", response_model=OrderResponse)
-def update_order(
+async def update_order(
     order_id: int,
     order_update: OrderUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    order = db.query(Order).filter(
+    result = await db.execute(select(Order).options(*ORDER_LOAD_OPTIONS).where(
         Order.id == order_id,
         Order.user_id == current_user.id
-    ).first()
+    ))
+    order = result.scalars().first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
@@ -109,33 +226,27 @@ def update_order(
     if order_update.transfer_receipt:
         order.transfer_receipt = order_update.transfer_receipt
     
-    db.commit()
-    db.refresh(order)
+    await db.commit()
     return order
 
 @router.post("/{order_id}/upload-receipt")
 async def upload_receipt(
     order_id: int,
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    order = db.query(Order).filter(
+    result = await db.execute(select(Order).where(
         Order.id == order_id,
         Order.user_id == current_user.id
-    ).first()
+    ))
+    order = result.scalars().first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    file_extension = os.path.splitext(file.filename)[1]
-    file_name = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, file_name)
+    upload = await store_upload(file, UPLOAD_DIR, RECEIPT_TYPES)
     
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-    
-    order.transfer_receipt = file_path
-    db.commit()
+    order.transfer_receipt = upload.path
+    await db.commit()
     
-    return {"message": "Receipt uploaded", "path": file_path}
+    return {"message": "Receipt uploaded", "path": upload.path, "sha256": upload.sha256}
@@ -1,13 +1,26 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status, UploadFile, File
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import os
-import uuid
-from database import get_db
-from models.models import Product, ProductImage, Category, Jeweler
+from database import get_db, get_async_db, get_async_read_db
+from models.models import Product, ProductImage, Category, Jeweler, product_categories
+from models.loaders import PRODUCT_LOAD_OPTIONS
+from models.category_tree import subtree_ids, subtree_product_ids
+from models.versioning import bump_product_versions
+from pagination import keyset_paginate_async
+from cache import catalog_cache, product_key, invalidate_products, CATEGORIES_KEY, CATEGORY_TREE_KEY
+from http_cache import not_modified, version_etag, versions_etag
+from search import product_search_index
+from facets import facet_index, facet_value_filter
+from inventory import inventory_ledger
+from carts import refresh_carts_containing
+from uploads import store_upload, IMAGE_TYPES
+from image_derivatives import VARIANTS, ensure_derivative, generate_derivatives, variant_redirect
 from schemas import (
     ProductCreate, ProductUpdate, ProductResponse,
-    CategoryCreate, CategoryUpdate, CategoryResponse, CategoryWithSubcategories,
+    CategoryCreate, CategoryUpdate, CategoryResponse, CategoryWithSubcategories, CategoryTreeNode,
     ProductImageCreate, ProductImageResponse
 )
 
@@ -16,39 +29,114 @@ router = APIRouter(prefix="/api/products", tags=["Products"])
 UPLOAD_DIR = "static/products"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+def _category_product_ids(db: Session, category_id: int) -> List[int]:
+    rows = db.query(product_categories.c.product_id).filter(
+        product_categories.c.category_id == category_id
+    ).all()
+    return [row[0] for row in rows]
+
 @router.get("/", response_model=List[ProductResponse])
-def get_products(
+async def get_products(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
     category_id: Optional[int] = None,
     material: Optional[str] = None,
+    karat: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     jeweler_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    query = db.query(Product)
+    query = select(Product.id, Product.version)
+    material_filter = facet_value_filter(Product.material, material)
+    karat_filter = facet_value_filter(Product.karat, karat)
     
     if category_id:
-        query = query.join(Product.categories).filter(Category.id == category_id)
-    if material:
-        query = query.filter(Product.material.ilike(f"%{material}%"))
+        query = query.where(Product.id.in_(subtree_product_ids(category_id)))
+    if material_filter is not None:
+        query = query.where(material_filter)
+    if karat_filter is not None:
+        query = query.where(karat_filter)
     if min_price is not None:
-        query = query.filter(Product.price >= min_price)
+        query = query.where(Product.price >= min_price)
     if max_price is not None:
-        query = query.filter(Product.price <= max_price)
+        query = query.where(Product.price <= max_price)
     if jeweler_id:
-        query = query.filter(Product.jeweler_id == jeweler_id)
+        query = query.where(Product.jeweler_id == jeweler_id)
     
-    products = query.offset(skip).limit(limit).all()
-    return products
+    page = await keyset_paginate_async(
+        db, query, [Product.id], limit, after=after, skip=skip, response=response, scalars=False
+    )
+    cached = not_modified(request, response, versions_etag("products", page))
+    if cached:
+        return cached
+    if not page:
+        return []
+    result = await db.execute(
+        select(Product).options(*PRODUCT_LOAD_OPTIONS)
+        .where(Product.id.in_([row.id for row in page]))
+        .order_by(Product.id)
+    )
+    return result.scalars().all()
+
+@router.get("/search", response_model=List[ProductResponse])
+def search_products(q: str, limit: int = 20, db: Session = Depends(get_db)):
+    product_search_index.ensure_built()
+    hits = product_search_index.search(q, limit)
+    if not hits:
+        return []
+    products = db.query(Product).options(*PRODUCT_LOAD_OPTIONS).filter(
+        Product.id.in_([product_id for product_id, _ in hits])
+    ).all()
+    by_id = {p.id: p for p in products}
+    return [by_id[product_id] for product_id, _ in hits if product_id in by_id]
+
+@router.get("/facets")
+def get_product_facets(
+    category_id: Optional[int] = None,
+    material: Optional[str] = None,
+    karat: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    jeweler_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    facet_index.ensure_built(db)
+    return facet_index.counts(
+        category_id=category_id,
+        material=material,
+        karat=karat,
+        jeweler_id=jeweler_id,
+        min_price=min_price,
+        max_price=max_price
+    )
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
+async def get_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    async def load():
+        result = await db.execute(select(Product).options(*PRODUCT_LOAD_OPTIONS).where(Product.id == product_id))
+        product = result.scalars().first()
+        return ProductResponse.model_validate(product) if product else None
+    
+    product = await catalog_cache.get_or_load_async(product_key(product_id), load)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return not_modified(request, response, version_etag("product", product.id, product.version)) or product
+
+@router.get("/{product_id}/availability")
+def get_product_availability(product_id: int, db: Session = Depends(get_db)):
+    availability = inventory_ledger.snapshot(db, product_id)
+    if not availability:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return availability
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 def create_product(product: ProductCreate, db: Session = Depends(get_db)):
@@ -75,6 +163,8 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     db.add(new_product)
     db.commit()
     db.refresh(new_product)
+    product_search_index.index_product(new_product)
+    facet_index.index_product(new_product)
     return new_product
 
 @router.put("/{product_id}", response_model=ProductResponse)
@@ -95,8 +185,15 @@ def update_product(
         categories = db.query(Category).filter(Category.id.in_(product.category_ids)).all()
         db_product.categories = categories
     
+    if "price" in update_data:
+        refresh_carts_containing(db, [product_id])
+    
     db.commit()
+    invalidate_products([product_id])
+    inventory_ledger.forget([product_id])
     db.refresh(db_product)
+    product_search_index.index_product(db_product)
+    facet_index.index_product(db_product)
     return db_product
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -106,49 +203,91 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Product not found")
     db.delete(db_product)
     db.commit()
+    invalidate_products([product_id])
+    inventory_ledger.forget([product_id])
+    product_search_index.remove_product(product_id)
+    facet_index.remove_product(product_id)
     return None
 
 @router.post("/{product_id}/images", response_model=ProductImageResponse, status_code=status.HTTP_201_CREATED)
 async def upload_product_image(
     product_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     display_order: int = 0,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    file_extension = os.path.splitext(file.filename)[1]
-    file_name = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, file_name)
-    
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    upload = await store_upload(file, UPLOAD_DIR, IMAGE_TYPES)
     
     image = ProductImage(
         product_id=product_id,
-        image_path=file_path,
+        image_path=upload.path,
         display_order=display_order
     )
     db.add(image)
-    db.commit()
-    db.refresh(image)
+    await db.commit()
+    invalidate_products([product_id])
+    background_tasks.add_task(generate_derivatives, upload.path)
     return image
 
+@router.get("/images/{image_id}/{variant}")
+async def get_product_image_variant(
+    image_id: int,
+    variant: str,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if variant not in VARIANTS:
+        raise HTTPException(status_code=404, detail="Image variant not found")
+    image = await db.get(ProductImage, image_id)
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return variant_redirect(image.image_path, await ensure_derivative(image.image_path, variant, image.derivatives_ready))
+
 @router.get("/categories/", response_model=List[CategoryResponse])
-def get_categories(db: Session = Depends(get_db)):
-    return db.query(Category).all()
+def get_categories(request: Request, response: Response, db: Session = Depends(get_db)):
+    categories = catalog_cache.get_or_load(
+        CATEGORIES_KEY,
+        lambda: [CategoryResponse.model_validate(c) for c in db.query(Category).all()]
+    )
+    return not_modified(request, response, versions_etag("categories", categories)) or categories
+
+@router.get("/categories/tree", response_model=List[CategoryTreeNode])
+def get_category_tree(request: Request, response: Response, db: Session = Depends(get_db)):
+    def load():
+        nodes = {
+            c.id: CategoryTreeNode(id=c.id, name=c.name, parent_id=c.parent_id, version=c.version)
+            for c in db.query(Category).order_by(Category.id).all()
+        }
+        roots = []
+        for node in nodes.values():
+            parent = nodes.get(node.parent_id)
+            (parent.children if parent else roots).append(node)
+        return roots
+    
+    def walk(nodes):
+        for node in nodes:
+            yield node
+            yield from walk(node.children)
+    
+    tree = catalog_cache.get_or_load(CATEGORY_TREE_KEY, load)
+    etag = version_etag("category-tree", [(n.id, n.parent_id, n.version) for n in walk(tree)])
+    return not_modified(request, response, etag) or tree
 
 @router.get("/categories/{category_id}", response_model=CategoryWithSubcategories)
-def get_category(category_id: int, db: Session = Depends(get_db)):
-    category = db.query(Category).filter(Category.id == category_id).first()
-    if not category:
+def get_category(category_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    rows = db.query(Category.id, Category.version).filter(
+        (Category.id == category_id) | (Category.parent_id == category_id)
+    ).order_by(Category.id).all()
+    if not any(row.id == category_id for row in rows):
         raise HTTPException(status_code=404, detail="Category not found")
-    return category
+    cached = not_modified(request, response, versions_etag("category", rows))
+    if cached:
+        return cached
+    return db.query(Category).filter(Category.id == category_id).first()
 
 @router.post("/categories/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
@@ -163,6 +302,8 @@ def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
     )
     db.add(new_category)
     db.commit()
+    catalog_cache.invalidate(CATEGORIES_KEY, CATEGORY_TREE_KEY)
+    facet_index.invalidate()
     db.refresh(new_category)
     return new_category
 
@@ -176,11 +317,24 @@ def update_category(
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
     
+    if category.parent_id is not None and category.parent_id != db_category.parent_id:
+        parent = db.query(Category).filter(Category.id == category.parent_id).first()
+        if not parent:
+            raise HTTPException(status_code=404, detail="Parent category not found")
+        if category.parent_id in subtree_ids(db, category_id):
+            raise HTTPException(status_code=400, detail="Category cannot be moved under itself or its subcategories")
+    
     update_data = category.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_category, key, value)
     
+    product_ids = _category_product_ids(db, category_id)
+    bump_product_versions(db, product_ids)
     db.commit()
+    catalog_cache.invalidate(CATEGORIES_KEY, CATEGORY_TREE_KEY)
+    invalidate_products(product_ids)
+    product_search_index.reindex(db, product_ids)
+    facet_index.invalidate()
     db.refresh(db_category)
     return db_category
 
@@ -189,6 +343,12 @@ def delete_category(category_id: int, db: Session = Depends(get_db)):
     db_category = db.query(Category).filter(Category.id == category_id).first()
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
+    product_ids = _category_product_ids(db, category_id)
+    bump_product_versions(db, product_ids)
     db.delete(db_category)
     db.commit()
+    catalog_cache.invalidate(CATEGORIES_KEY, CATEGORY_TREE_KEY)
+    invalidate_products(product_ids)
+    product_search_index.reindex(db, product_ids)
+    facet_index.invalidate()
     return None
@@ -1,27 +1,27 @@
 from .user import (
-    UserBase, UserCreate, UserUpdate, UserResponse, UserLogin, Token, TokenData
+    UserBase, UserCreate, UserUpdate, UserResponse, UserLogin, Token, RefreshRequest, TokenData, Principal
 )
 from .schemas import (
     JewelerBase, JewelerCreate, JewelerUpdate, JewelerResponse,
     PaymentMethodBase, PaymentMethodCreate, PaymentMethodUpdate, PaymentMethodResponse,
-    CategoryBase, CategoryCreate, CategoryUpdate, CategoryResponse, CategoryWithSubcategories,
+    CategoryBase, CategoryCreate, CategoryUpdate, CategoryResponse, CategoryWithSubcategories, CategoryTreeNode,
     ProductImageBase, ProductImageCreate, ProductImageResponse,
     ProductBase, ProductCreate, ProductUpdate, ProductResponse,
-    CartItemBase, CartItemCreate, CartItemUpdate, CartItemResponse, CartResponse,
-    OrderItemBase, OrderItemResponse, OrderBase, OrderCreate, OrderUpdate, OrderResponse,
-    UserGeneratedDesignBase, UserGeneratedDesignCreate, UserGeneratedDesignResponse,
+    CartItemBase, CartItemCreate, CartItemUpdate, CartOperation, CartBatchUpdate, CartProductResponse, CartItemResponse, CartResponse, CartSummaryResponse, GuestCartItemResponse, GuestCartResponse,
+    OrderItemBase, OrderItemResponse, OrderBase, OrderCreate, OrderUpdate, OrderResponse, OrderSummaryResponse,
+    UserGeneratedDesignBase, UserGeneratedDesignCreate, UserGeneratedDesignResponse, DesignJobResponse,
     DesignRequestBase, DesignRequestCreate, DesignRequestUpdate, DesignRequestResponse
 )
 
 __all__ = [
-    'UserBase', 'UserCreate', 'UserUpdate', 'UserResponse', 'UserLogin', 'Token', 'TokenData',
+    'UserBase', 'UserCreate', 'UserUpdate', 'UserResponse', 'UserLogin', 'Token', 'RefreshRequest', 'TokenData', 'Principal',
     'JewelerBase', 'JewelerCreate', 'JewelerUpdate', 'JewelerResponse',
     'PaymentMethodBase', 'PaymentMethodCreate', 'PaymentMethodUpdate', 'PaymentMethodResponse',
-    'CategoryBase', 'CategoryCreate', 'CategoryUpdate', 'CategoryResponse', 'CategoryWithSubcategories',
+    'CategoryBase', 'CategoryCreate', 'CategoryUpdate', 'CategoryResponse', 'CategoryWithSubcategories', 'CategoryTreeNode',
     'ProductImageBase', 'ProductImageCreate', 'ProductImageResponse',
     'ProductBase', 'ProductCreate', 'ProductUpdate', 'ProductResponse',
-    'CartItemBase', 'CartItemCreate', 'CartItemUpdate', 'CartItemResponse', 'CartResponse',
-    'OrderItemBase', 'OrderItemResponse', 'OrderBase', 'OrderCreate', 'OrderUpdate', 'OrderResponse',
-    'UserGeneratedDesignBase', 'UserGeneratedDesignCreate', 'UserGeneratedDesignResponse',
+    'CartItemBase', 'CartItemCreate', 'CartItemUpdate', 'CartOperation', 'CartBatchUpdate', 'CartProductResponse', 'CartItemResponse', 'CartResponse', 'CartSummaryResponse', 'GuestCartItemResponse', 'GuestCartResponse',
+    'OrderItemBase', 'OrderItemResponse', 'OrderBase', 'OrderCreate', 'OrderUpdate', 'OrderResponse', 'OrderSummaryResponse',
+    'UserGeneratedDesignBase', 'UserGeneratedDesignCreate', 'UserGeneratedDesignResponse', 'DesignJobResponse',
     'DesignRequestBase', 'DesignRequestCreate', 'DesignRequestUpdate', 'DesignRequestResponse'
 ]
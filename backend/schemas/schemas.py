@@ -1,7 +1,8 @@
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Dict, Literal, Optional, List
+from pydantic import BaseModel, Field, computed_field
 from models.models import OrderStatus, DesignRequestStatus
+from image_derivatives import variant_urls
 
 class JewelerBase(BaseModel):
     name: str
@@ -65,6 +66,7 @@ class CategoryUpdate(BaseModel):
 
 class CategoryResponse(CategoryBase):
     id: int
+    version: int = 1
     
     class Config:
         from_attributes = True
@@ -72,6 +74,9 @@ class CategoryResponse(CategoryBase):
 class CategoryWithSubcategories(CategoryResponse):
     subcategories: List['CategoryResponse'] = []
 
+class CategoryTreeNode(CategoryResponse):
+    children: List['CategoryTreeNode'] = []
+
 class ProductImageBase(BaseModel):
     image_path: str
     display_order: int = 0
@@ -82,6 +87,12 @@ class ProductImageCreate(ProductImageBase):
 class ProductImageResponse(ProductImageBase):
     id: int
     product_id: int
+    derivatives_ready: bool = Field(default=False, exclude=True)
+    
+    @computed_field
+    @property
+    def variants(self) -> Dict[str, str]:
+        return variant_urls(self.image_path, self.derivatives_ready, f"/api/products/images/{self.id}")
     
     class Config:
         from_attributes = True
@@ -113,6 +124,7 @@ class ProductUpdate(BaseModel):
 
 class ProductResponse(ProductBase):
     id: int
+    version: int = 1
     images: List[ProductImageResponse] = []
     categories: List[CategoryResponse] = []
     
@@ -129,10 +141,30 @@ class CartItemCreate(CartItemBase):
 class CartItemUpdate(BaseModel):
     quantity: int
 
+class CartOperation(BaseModel):
+    op: Literal["add", "update", "remove"]
+    product_id: Optional[int] = None
+    item_id: Optional[int] = None
+    quantity: int = 1
+
+class CartBatchUpdate(BaseModel):
+    operations: List[CartOperation]
+
+class CartProductResponse(BaseModel):
+    id: int
+    name: str
+    price: float
+    material: Optional[str] = None
+    karat: Optional[str] = None
+    image_path: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
 class CartItemResponse(CartItemBase):
     id: int
     cart_id: int
-    product: ProductResponse
+    product: CartProductResponse
     
     class Config:
         from_attributes = True
@@ -142,11 +174,24 @@ class CartResponse(BaseModel):
     user_id: int
     updated_at: datetime
     items: List[CartItemResponse] = []
+    item_count: int = 0
     total: float = 0
     
     class Config:
         from_attributes = True
 
+class CartSummaryResponse(BaseModel):
+    item_count: int = 0
+    total: float = 0
+
+class GuestCartItemResponse(CartItemBase):
+    product: CartProductResponse
+
+class GuestCartResponse(BaseModel):
+    items: List[GuestCartItemResponse] = []
+    item_count: int = 0
+    total: float = 0
+
 class OrderItemBase(BaseModel):
     product_id: int
     quantity: int = 1
@@ -183,6 +228,17 @@ class OrderResponse(OrderBase):
     class Config:
         from_attributes = True
 
+class OrderSummaryResponse(BaseModel):
+    order_id: int
+    order_date: datetime
+    status: OrderStatus
+    total_amount: float
+    item_count: int = 0
+    thumbnail_path: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
 class UserGeneratedDesignBase(BaseModel):
     selected_options: dict
     generated_image_url: Optional[str] = None
@@ -203,10 +259,27 @@ class UserGeneratedDesignResponse(BaseModel):
     generated_image_url: Optional[str] = None
     created_at: datetime
     user_id: Optional[int] = None
+    derivatives_ready: bool = Field(default=False, exclude=True)
+    
+    @computed_field
+    @property
+    def variants(self) -> Dict[str, str]:
+        return variant_urls(self.generated_image_url, self.derivatives_ready, f"/api/ai/designs/{self.id}/variants")
     
     class Config:
         from_attributes = True
 
+class DesignJobResponse(BaseModel):
+    job_id: str
+    status: str
+    attempts: int = 0
+    cached: bool = False
+    coalesced: bool = False
+    design: Optional[UserGeneratedDesignResponse] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
 class DesignRequestBase(BaseModel):
     jeweler_id: Optional[int] = None
     generated_design_id: Optional[int] = None
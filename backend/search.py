@@ -0,0 +1,221 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+from sqlalchemy.orm import Session, selectinload
+from database import SessionLocal
+from models.models import Product
+
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "category": 2.0,
+    "material": 1.5,
+    "karat": 1.5,
+    "description": 1.0
+}
+PREFIX_WEIGHT = 0.7
+FUZZY_WEIGHT = 0.5
+MIN_PREFIX_LENGTH = 2
+MIN_FUZZY_LENGTH = 4
+MAX_EXPANSIONS = 20
+CANDIDATE_LIMIT = 5000
+CHAMPION_LIST_SIZE = 500
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+def _deletes(term: str) -> Set[str]:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def _within_one_edit(a: str, b: str) -> bool:
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diffs) <= 1:
+            return True
+        i, j = diffs[0], diffs[-1]
+        return len(diffs) == 2 and j == i + 1 and a[i] == b[j] and a[j] == b[i]
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+class ProductSearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._doc_terms: Dict[int, Set[str]] = {}
+        self._terms: List[str] = []
+        self._delete_index: Dict[str, Set[str]] = defaultdict(set)
+        self._champion_cache: Dict[str, List[int]] = {}
+        self.built = False
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def ensure_built(self) -> None:
+        if self.built:
+            return
+        with self._lock:
+            if self.built:
+                return
+            # Read through a session opened under the lock: a write that skipped indexing because
+            # the index was not built yet committed before this snapshot, and later writes wait.
+            db = SessionLocal()
+            try:
+                products = db.query(Product).options(selectinload(Product.categories)).all()
+                for product in products:
+                    self._add(product)
+            finally:
+                db.close()
+            self.built = True
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.built = False
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._terms.clear()
+            self._delete_index.clear()
+            self._champion_cache.clear()
+
+    def index_product(self, product: Product) -> None:
+        with self._lock:
+            if not self.built:
+                return
+            self._remove(product.id)
+            self._add(product)
+
+    def remove_product(self, product_id: int) -> None:
+        with self._lock:
+            if self.built:
+                self._remove(product_id)
+
+    def reindex(self, db: Session, product_ids: Iterable[int]) -> None:
+        product_ids = list(product_ids)
+        if not self.built or not product_ids:
+            return
+        products = db.query(Product).options(selectinload(Product.categories)).filter(
+            Product.id.in_(product_ids)
+        ).all()
+        with self._lock:
+            for product_id in product_ids:
+                self._remove(product_id)
+            for product in products:
+                self._add(product)
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, float]]:
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        with self._lock:
+            total_docs = len(self._doc_terms) or 1
+            expanded = []
+            for token in tokens:
+                terms = [
+                    (self._postings[term], weight * math.log(1 + total_docs / len(self._postings[term])), term)
+                    for term, weight in self._expand(token)
+                ]
+                if terms:
+                    expanded.append(terms)
+            candidates: Set[int] = set()
+            for terms in expanded:
+                exhaustive = sum(len(postings) for postings, _, _ in terms) <= CANDIDATE_LIMIT
+                for postings, _, term in terms:
+                    candidates.update(postings if exhaustive else self._champions(term))
+            ranked = []
+            for product_id in candidates:
+                score = 0.0
+                matched = 0
+                for terms in expanded:
+                    best = max(postings.get(product_id, 0.0) * weight for postings, weight, _ in terms)
+                    if best:
+                        score += best
+                        matched += 1
+                ranked.append((matched, score, product_id))
+            top = heapq.nlargest(limit, ranked)
+            return [(product_id, score) for _, score, product_id in top]
+
+    def _champions(self, term: str) -> List[int]:
+        champions = self._champion_cache.get(term)
+        if champions is None:
+            postings = self._postings[term]
+            champions = heapq.nlargest(CHAMPION_LIST_SIZE, postings, key=postings.__getitem__)
+            self._champion_cache[term] = champions
+        return champions
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        expansions: Dict[str, float] = {}
+        if token in self._postings:
+            expansions[token] = 1.0
+        if len(token) >= MIN_PREFIX_LENGTH:
+            start = bisect.bisect_left(self._terms, token)
+            for term in self._terms[start:start + MAX_EXPANSIONS]:
+                if not term.startswith(token):
+                    break
+                expansions.setdefault(term, PREFIX_WEIGHT)
+        if len(token) >= MIN_FUZZY_LENGTH:
+            candidates = set(self._delete_index.get(token, ()))
+            for deleted in _deletes(token):
+                if deleted in self._postings:
+                    candidates.add(deleted)
+                candidates.update(self._delete_index.get(deleted, ()))
+            for term in candidates:
+                if term not in expansions and _within_one_edit(token, term):
+                    expansions[term] = FUZZY_WEIGHT
+        return list(expansions.items())
+
+    def _fields(self, product: Product) -> Dict[str, str]:
+        return {
+            "name": product.name,
+            "description": product.description,
+            "material": product.material,
+            "karat": product.karat,
+            "category": " ".join(c.name for c in product.categories)
+        }
+
+    def _add(self, product: Product) -> None:
+        weights: Dict[str, float] = defaultdict(float)
+        for field, text in self._fields(product).items():
+            tokens = tokenize(text)
+            if not tokens:
+                continue
+            norm = FIELD_WEIGHTS[field] / math.sqrt(len(tokens))
+            for token in tokens:
+                weights[token] += norm
+        for term, weight in weights.items():
+            if term not in self._postings:
+                self._postings[term] = {}
+                bisect.insort(self._terms, term)
+                if len(term) >= MIN_FUZZY_LENGTH - 1:
+                    for deleted in _deletes(term):
+                        self._delete_index[deleted].add(term)
+            self._postings[term][product.id] = weight
+            self._champion_cache.pop(term, None)
+        self._doc_terms[product.id] = set(weights)
+
+    def _remove(self, product_id: int) -> None:
+        for term in self._doc_terms.pop(product_id, ()):
+            postings = self._postings[term]
+            postings.pop(product_id, None)
+            self._champion_cache.pop(term, None)
+            if postings:
+                continue
+            del self._postings[term]
+            del self._terms[bisect.bisect_left(self._terms, term)]
+            for deleted in _deletes(term):
+                siblings = self._delete_index.get(deleted)
+                if siblings is not None:
+                    siblings.discard(term)
+                    if not siblings:
+                        del self._delete_index[deleted]
+
+product_search_index = ProductSearchIndex()
@@ -6,15 +6,19 @@ from datetime import datetime
 from database import engine, SessionLocal, Base
 from models.models import (
     User, Jeweler, Category, PaymentMethod, Product, ProductImage,
-    Gender
+    Gender, category_closure
 )
+from models import register_listeners
 from auth import get_password_hash
 
+register_listeners()
+
 def clear_database():
     print("Clearing existing data...")
     db = SessionLocal()
     try:
         db.query(Product).delete()
+        db.execute(category_closure.delete())
         db.query(Category).delete()
         db.query(PaymentMethod).delete()
         db.query(Jeweler).delete()
@@ -0,0 +1,186 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+from functools import lru_cache
+from typing import FrozenSet, Iterator, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response, StreamingResponse
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+COMPRESSIBLE_EXTENSIONS = (".html", ".js", ".css", ".json", ".svg", ".txt", ".map")
+RANGE_CHUNK_BYTES = 64 * 1024
+
+_CONTENT_ADDRESSED = re.compile(
+    r"^(?:[0-9a-f]{32,64}(?:-[0-9a-f]{8})?|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$"
+)
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def is_content_addressed(path: str) -> bool:
+    return bool(_CONTENT_ADDRESSED.match(os.path.basename(path).split(".", 1)[0]))
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(RANGE_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def strong_etag(path: str, stat_result: os.stat_result, encoding: Optional[str] = None) -> str:
+    if is_content_addressed(path):
+        tag = os.path.basename(path)
+    else:
+        tag = _file_digest(path, stat_result.st_mtime_ns, stat_result.st_size)
+    return f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    match = _RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if start:
+        first, last = int(start), int(end) if end else size - 1
+    else:
+        first, last = max(size - int(end), 0), size - 1
+    return first, min(last, size - 1)
+
+def _iter_range(path: str, first: int, last: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = f.read(min(RANGE_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def precompress(directory: str, target_directory: str, recursive: bool = True) -> int:
+    written = 0
+    for root, dirs, files in os.walk(directory):
+        if not recursive:
+            dirs.clear()
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            mtime = os.stat(path).st_mtime
+            with open(path, "rb") as f:
+                data = f.read()
+            encoders = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                encoders.append((".br", brotli.compress))
+            target_root = os.path.join(target_directory, os.path.relpath(root, directory))
+            os.makedirs(target_root, exist_ok=True)
+            for suffix, compress in encoders:
+                target = os.path.join(target_root, name + suffix)
+                if os.path.exists(target) and os.stat(target).st_mtime >= mtime:
+                    continue
+                with open(target, "wb") as f:
+                    f.write(compress(data))
+                written += 1
+    return written
+
+class CachedStaticFiles(StaticFiles):
+    def __init__(
+        self,
+        *args,
+        allowed_extensions: Optional[FrozenSet[str]] = None,
+        recursive: bool = True,
+        precompressed_directory: Optional[str] = None,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.allowed_extensions = allowed_extensions
+        self.recursive = recursive
+        self.precompressed_directory = precompressed_directory
+
+    def lookup_path(self, path: str) -> Tuple[str, Optional[os.stat_result]]:
+        path = os.path.normpath(path)
+        if path == ".":
+            return super().lookup_path(path)
+        if not self.recursive and os.path.dirname(path):
+            return "", None
+        if self.allowed_extensions is not None and os.path.splitext(path)[1].lower() not in self.allowed_extensions:
+            return "", None
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is not None and stat.S_ISREG(stat_result.st_mode) and not is_content_addressed(full_path):
+            # lookup_path runs in a worker thread; hash here so file_response hits the cache.
+            _file_digest(full_path, stat_result.st_mtime_ns, stat_result.st_size)
+        return full_path, stat_result
+
+    def encoded_variant(self, full_path: str, stat_result: os.stat_result, accepted: str) -> Optional[Tuple[str, str]]:
+        if not self.precompressed_directory or not self.directory:
+            return None
+        relative = os.path.relpath(full_path, os.path.realpath(self.directory))
+        for suffix, encoding in ((".br", "br"), (".gz", "gzip")):
+            if encoding not in accepted:
+                continue
+            path = os.path.join(self.precompressed_directory, relative + suffix)
+            if os.path.exists(path) and os.stat(path).st_mtime >= stat_result.st_mtime:
+                return path, encoding
+        return None
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if is_content_addressed(full_path) else REVALIDATE_CACHE_CONTROL,
+            "Accept-Ranges": "bytes",
+        }
+        media_path, media_stat, encoding = full_path, stat_result, None
+        if full_path.endswith(COMPRESSIBLE_EXTENSIONS):
+            headers["Vary"] = "Accept-Encoding"
+            variant = self.encoded_variant(full_path, stat_result, request_headers.get("accept-encoding", ""))
+            if variant is not None:
+                media_path, encoding = variant
+                media_stat = os.stat(media_path)
+                headers["Content-Encoding"] = encoding
+        headers["ETag"] = strong_etag(full_path, stat_result, encoding)
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]):
+            return Response(status_code=304, headers=headers)
+        
+        media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if (
+            range_header
+            and scope["method"] == "GET"
+            and "Content-Encoding" not in headers
+            and (not if_range or if_range.strip() == headers["ETag"])
+        ):
+            size = stat_result.st_size
+            byte_range = parse_range(range_header, size)
+            if byte_range is not None:
+                first, last = byte_range
+                if first >= size or first > last:
+                    headers["Content-Range"] = f"bytes */{size}"
+                    return Response(status_code=416, headers=headers)
+                headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+                headers["Content-Length"] = str(last - first + 1)
+                return StreamingResponse(
+                    _iter_range(full_path, first, last),
+                    status_code=206,
+                    headers=headers,
+                    media_type=media_type
+                )
+        
+        return FileResponse(
+            media_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=media_stat
+        )
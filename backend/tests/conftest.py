@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+_TEST_DIR = tempfile.mkdtemp(prefix="jewelry-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_TEST_DIR, 'test.db')}",
+    AI_IMAGE_GENERATOR="fake",
+    BCRYPT_ROUNDS="4",
+    GUEST_CART_STORE_PATH="",
+    STATIC_PRECOMPRESSED_DIR=os.path.join(_TEST_DIR, "precompressed"),
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(_TEST_DIR)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+@pytest.fixture(scope="session")
+def jeweler_id(client):
+    response = client.post("/api/admin/jewelers", json={"name": "Test Jeweler", "shop_name": "Test Shop", "email": "jeweler@example.com"})
+    return response.json()["id"]
+
+def login(client, username: str) -> dict:
+    client.post("/api/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "secret123"})
+    response = client.post("/api/auth/login", data={"username": username, "password": "secret123"})
+    assert response.status_code == 200
+    return response.json()
+
+@contextmanager
+def count_statements():
+    from database import engine, read_engine, async_engine, async_read_engine
+    engines = {engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine}
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for target in engines:
+        event.listen(target, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", record)
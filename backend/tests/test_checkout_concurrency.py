@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+from auth import issue_tokens
+from database import SessionLocal
+from models.models import Cart, CartItem, Order, PaymentMethod, Product, User
+
+CHECKOUTS = 200
+STOCK = 25
+
+def _seed(jeweler_id: int):
+    db = SessionLocal()
+    try:
+        product = Product(name="Hot Ring", price=250, stock_quantity=STOCK, jeweler_id=jeweler_id)
+        method = PaymentMethod(method_name="Bank transfer")
+        db.add_all([product, method])
+        db.flush()
+        users = [
+            User(username=f"buyer{n}", email=f"buyer{n}@example.com", password="unused")
+            for n in range(CHECKOUTS)
+        ]
+        db.add_all(users)
+        db.flush()
+        for user in users:
+            cart = Cart(user_id=user.id)
+            db.add(cart)
+            db.flush()
+            db.add(CartItem(cart_id=cart.id, product_id=product.id, quantity=1))
+        db.commit()
+        tokens = [issue_tokens(user.id, user.username)["access_token"] for user in users]
+        return product.id, method.id, tokens
+    finally:
+        db.close()
+
+def test_parallel_checkouts_never_oversell(client, jeweler_id):
+    product_id, method_id, tokens = _seed(jeweler_id)
+
+    def checkout(token):
+        return client.post(
+            "/api/orders/",
+            json={"payment_method_id": method_id, "shipping_address": "1 Main St"},
+            headers={"Authorization": f"Bearer {token}"}
+        ).status_code
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        statuses = list(pool.map(checkout, tokens))
+
+    db = SessionLocal()
+    try:
+        stock = db.query(Product.stock_quantity).filter(Product.id == product_id).scalar()
+        orders = db.query(Order).join(Order.items).filter_by(product_id=product_id).count()
+    finally:
+        db.close()
+    assert statuses.count(201) == STOCK
+    assert set(statuses) <= {201, 400}
+    assert orders == STOCK
+    assert stock == 0
@@ -0,0 +1,64 @@
+import base64
+import os
+import design_cache as design_cache_module
+from database import SessionLocal
+from design_cache import DesignCache
+from design_generation import _solid_png
+from image_derivatives import derivative_path
+from models.models import UserGeneratedDesign
+
+IMAGE = base64.b64encode(_solid_png(4, 4, b"\x10\x20\x30")).decode("ascii")
+
+def _key(n: int) -> str:
+    return f"{n:032x}"
+
+def test_evicted_unreferenced_images_are_deleted(client, monkeypatch):
+    monkeypatch.setattr(design_cache_module, "ORPHAN_GRACE_SECONDS", -1)
+    cache = DesignCache(max_entries=2, variants=1)
+    orphan = cache.store(_key(101), IMAGE)
+    open(derivative_path(orphan, "thumb"), "wb").close()
+    kept = cache.store(_key(102), IMAGE)
+    db = SessionLocal()
+    try:
+        db.add(UserGeneratedDesign(selected_options={}, generated_image_url=kept))
+        db.commit()
+    finally:
+        db.close()
+    cache.store(_key(103), IMAGE)
+    cache.store(_key(104), IMAGE)
+
+    assert not os.path.exists(orphan)
+    assert not os.path.exists(derivative_path(orphan, "thumb"))
+    assert os.path.exists(kept)
+    assert cache.stats()["evictions"] == 2
+    assert cache.lookup(_key(101)) is None
+
+def test_fresh_images_survive_eviction(client):
+    cache = DesignCache(max_entries=1, variants=1)
+    first = cache.store(_key(201), IMAGE)
+    cache.store(_key(202), IMAGE)
+    assert os.path.exists(first)
+
+def test_lookup_trusts_the_index(client):
+    cache = DesignCache(max_entries=4, variants=1)
+    path = cache.store(_key(301), IMAGE)
+    os.remove(path)
+    assert cache.lookup(_key(301)) == path
+
+def test_load_rebuilds_index_and_drops_orphans_past_the_cap(client, monkeypatch):
+    monkeypatch.setattr(design_cache_module, "ORPHAN_GRACE_SECONDS", -1)
+    directory = os.path.join("static", "design-cache-load")
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for n in range(3):
+        path = os.path.join(directory, f"{_key(400 + n)}-0000000{n}.png")
+        with open(path, "wb") as image:
+            image.write(base64.b64decode(IMAGE))
+        os.utime(path, (1_000_000 + n, 1_000_000 + n))
+        paths.append(path)
+
+    cache = DesignCache(max_entries=2, variants=1)
+    assert cache.load(directory) == 3
+    assert not os.path.exists(paths[0])
+    assert cache.lookup(_key(401)) == paths[1]
+    assert cache.lookup(_key(402)) == paths[2]
@@ -0,0 +1,68 @@
+import time
+import design_generation
+from config import settings
+from design_jobs import design_job_queue
+from conftest import login
+
+DESIGN = {
+    "type": "Pendant", "color": "Silver", "shape": "Heart", "material": "Silver",
+    "karat": "925", "gemstone_type": "Ruby", "gemstone_color": "Red"
+}
+
+def _headers(client, username: str) -> dict:
+    return {"Authorization": f"Bearer {login(client, username)['access_token']}"}
+
+def _poll(client, job_id: str, headers: dict, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/ai/design-jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("succeeded", "failed") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+def test_design_job_runs_to_success(client, monkeypatch):
+    monkeypatch.setattr(settings, "AI_FAKE_GENERATOR_DELAY_SECONDS", 0.1)
+    headers = _headers(client, "designer")
+    created = client.post("/api/ai/design-jobs", json=DESIGN, headers=headers)
+    assert created.status_code == 202
+    assert created.json()["status"] == "queued"
+
+    job = _poll(client, created.json()["job_id"], headers)
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 1
+    design = job["design"]
+    assert design["generated_image_url"].startswith("static/generated_designs/")
+    designs = client.get("/api/ai/designs", headers=headers).json()
+    assert design["id"] in [d["id"] for d in designs]
+
+    other = _headers(client, "snooper")
+    assert client.get(f"/api/ai/design-jobs/{job['job_id']}", headers=other).status_code == 404
+
+def test_design_job_reports_failure(client, monkeypatch):
+    async def broken(prompt: str):
+        return None
+
+    monkeypatch.setitem(design_generation.IMAGE_GENERATORS, "fake", broken)
+    monkeypatch.setattr(design_job_queue, "max_attempts", 1)
+    headers = _headers(client, "unlucky")
+    created = client.post("/api/ai/design-jobs", json={**DESIGN, "gemstone_color": "Pink"}, headers=headers)
+    job = _poll(client, created.json()["job_id"], headers)
+    assert job["status"] == "failed"
+    assert job["error"]
+    assert job["design"] is None
+
+def test_design_job_events_stream_until_finished(client, monkeypatch):
+    monkeypatch.setattr(settings, "AI_FAKE_GENERATOR_DELAY_SECONDS", 0.1)
+    headers = _headers(client, "watcher")
+    created = client.post("/api/ai/design-jobs", json={**DESIGN, "gemstone_color": "Green"}, headers=headers)
+    job_id = created.json()["job_id"]
+
+    events = []
+    with client.stream("GET", f"/api/ai/design-jobs/{job_id}/events", headers=headers) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                events.append(line.removeprefix("event: "))
+    assert events[-1] == "succeeded"
+    assert set(events) <= {"queued", "running", "succeeded"}
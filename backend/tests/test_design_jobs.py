@@ -0,0 +1,112 @@
+import asyncio
+import uuid
+import pytest
+from fastapi import HTTPException
+import design_generation
+from config import settings
+from design_cache import design_cache
+from design_jobs import DesignJobQueue, JOB_FAILED, JOB_SUCCEEDED
+from schemas import UserGeneratedDesignCreate
+
+def _design(**overrides) -> UserGeneratedDesignCreate:
+    options = dict(
+        type="Ring", color="Gold", shape="Round", material="Gold", karat="18K",
+        gemstone_type="Sapphire", gemstone_color=uuid.uuid4().hex[:8]
+    )
+    options.update(overrides)
+    return UserGeneratedDesignCreate(**options)
+
+@pytest.fixture
+def generator(client, monkeypatch):
+    calls = []
+    outcomes = []
+    original = design_generation.IMAGE_GENERATORS["fake"]
+
+    async def generate(prompt: str):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        if outcomes and not outcomes.pop(0):
+            return None
+        return await original(prompt)
+
+    monkeypatch.setitem(design_generation.IMAGE_GENERATORS, "fake", generate)
+    monkeypatch.setattr(settings, "AI_FAKE_GENERATOR_DELAY_SECONDS", 0)
+    monkeypatch.setattr(settings, "AI_JOB_RETRY_BACKOFF_SECONDS", 0)
+    generate.calls = calls
+    generate.outcomes = outcomes
+    return generate
+
+def _run(queue: DesignJobQueue, scenario):
+    async def main():
+        queue.start()
+        try:
+            return await scenario()
+        finally:
+            await asyncio.gather(*list(queue._side_tasks), return_exceptions=True)
+            await queue.stop()
+    return asyncio.run(main())
+
+def test_identical_submissions_share_one_upstream_call(generator):
+    queue = DesignJobQueue(workers=2, max_pending=10, max_attempts=1, result_ttl_seconds=60)
+    design = _design()
+
+    async def scenario():
+        jobs = [queue.submit(None, design) for _ in range(5)]
+        await asyncio.gather(*[job.wait_finished() for job in jobs])
+        first_round = [job.status for job in jobs]
+        design_cache.clear()
+        again = queue.submit(None, design)
+        await again.wait_finished()
+        return first_round, again.status
+
+    first_round, again = _run(queue, scenario)
+    assert first_round == [JOB_SUCCEEDED] * 5
+    assert again == JOB_SUCCEEDED
+    stats = queue.stats()
+    assert stats["upstream_calls"] == 2
+    assert stats["coalesced"] == 4
+    assert stats["inflight"] == 0
+    assert len(generator.calls) == 2
+
+def test_full_queue_rejects_with_429(generator):
+    queue = DesignJobQueue(workers=0, max_pending=2, max_attempts=1, result_ttl_seconds=60)
+
+    async def scenario():
+        queue.submit(None, _design())
+        queue.submit(None, _design())
+        with pytest.raises(HTTPException) as rejected:
+            queue.submit(None, _design())
+        return rejected.value
+
+    rejected = _run(queue, scenario)
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"]
+    assert queue.stats()["rejected"] == 1
+
+def test_failed_generation_is_retried(generator):
+    queue = DesignJobQueue(workers=1, max_pending=10, max_attempts=3, result_ttl_seconds=60)
+    generator.outcomes.extend([False, True])
+
+    async def scenario():
+        job = queue.submit(None, _design())
+        await job.wait_finished()
+        return job
+
+    job = _run(queue, scenario)
+    assert job.status == JOB_SUCCEEDED
+    assert job.attempts == 2
+    assert queue.stats()["retries"] == 1
+
+def test_generation_fails_after_max_attempts(generator):
+    queue = DesignJobQueue(workers=1, max_pending=10, max_attempts=2, result_ttl_seconds=60)
+    generator.outcomes.extend([False, False])
+
+    async def scenario():
+        job = queue.submit(None, _design())
+        await job.wait_finished()
+        return job
+
+    job = _run(queue, scenario)
+    assert job.status == JOB_FAILED
+    assert len(generator.calls) == 2
+    assert queue.stats()["inflight"] == 0
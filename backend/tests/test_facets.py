@@ -0,0 +1,40 @@
+import pytest
+from database import SessionLocal
+from facets import facet_index
+from models.models import Product
+
+@pytest.fixture(scope="module")
+def facet_jeweler(client):
+    response = client.post("/api/admin/jewelers", json={"name": "Facet Jeweler", "shop_name": "Facet Shop", "email": "facets@example.com"})
+    jeweler_id = response.json()["id"]
+    db = SessionLocal()
+    try:
+        db.add_all([
+            Product(name="Rose band", price=300, stock_quantity=1, jeweler_id=jeweler_id, material="Rose Gold", karat="14K"),
+            Product(name="White band", price=700, stock_quantity=1, jeweler_id=jeweler_id, material="White Gold", karat="18K"),
+            Product(name="Plain band", price=900, stock_quantity=1, jeweler_id=jeweler_id, material="Gold", karat="18k"),
+            Product(name="Gold chain", price=1200, stock_quantity=1, jeweler_id=jeweler_id, material=" gold ", karat="22K"),
+            Product(name="Silver band", price=150, stock_quantity=1, jeweler_id=jeweler_id, material="Silver")
+        ])
+        db.commit()
+    finally:
+        db.close()
+    facet_index.invalidate()
+    return jeweler_id
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"material": "gold"},
+    {"material": "Rose Gold"},
+    {"material": "GOLD", "karat": "18k"},
+    {"karat": "18K"},
+    {"material": "silver", "max_price": 200},
+    {"min_price": 500, "max_price": 1200},
+    {"material": "platinum"}
+])
+def test_facet_totals_match_listing(client, facet_jeweler, filters):
+    params = {"jeweler_id": facet_jeweler, **filters}
+    listing = client.get("/api/products/", params={**params, "limit": 1000})
+    facets = client.get("/api/products/facets", params=params)
+    assert listing.status_code == 200 and facets.status_code == 200
+    assert facets.json()["total"] == len(listing.json())
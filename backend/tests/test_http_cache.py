@@ -0,0 +1,80 @@
+import io
+import uuid
+import pytest
+from PIL import Image
+from conftest import login
+
+@pytest.fixture
+def catalog(client):
+    jeweler = client.post("/api/admin/jewelers", json={
+        "name": "Cache Jeweler", "shop_name": "Cache Shop", "email": f"cache-{uuid.uuid4().hex[:8]}@example.com"
+    }).json()
+    category = client.post("/api/products/categories/", json={"name": f"Cache rings {jeweler['id']}"}).json()
+    product = client.post("/api/products/", json={
+        "name": "Cache ring", "price": 500, "stock_quantity": 5, "jeweler_id": jeweler["id"],
+        "material": "Gold", "karat": "18K", "gemstone_type": "None", "gemstone_color": "None",
+        "category_ids": [category["id"]]
+    })
+    assert product.status_code == 201
+    return {"jeweler_id": jeweler["id"], "category_id": category["id"], "product_id": product.json()["id"]}
+
+def _urls(catalog) -> dict:
+    return {
+        "detail": f"/api/products/{catalog['product_id']}",
+        "listing": f"/api/products/?jeweler_id={catalog['jeweler_id']}",
+    }
+
+def _etags(client, catalog) -> dict:
+    etags = {}
+    for name, url in _urls(catalog).items():
+        response = client.get(url)
+        assert response.status_code == 200
+        etags[name] = response.headers["ETag"]
+    return etags
+
+def _assert_revalidation(client, catalog, etags: dict, expected: int) -> None:
+    for name, url in _urls(catalog).items():
+        response = client.get(url, headers={"If-None-Match": etags[name]})
+        assert response.status_code == expected, name
+
+def test_unchanged_product_revalidates_with_304(client, catalog):
+    etags = _etags(client, catalog)
+    _assert_revalidation(client, catalog, etags, 304)
+    response = client.get(_urls(catalog)["detail"], headers={"If-None-Match": etags["detail"]})
+    assert response.headers["ETag"] == etags["detail"]
+    assert response.content == b""
+
+def test_product_update_changes_etags(client, catalog):
+    etags = _etags(client, catalog)
+    assert client.put(f"/api/products/{catalog['product_id']}", json={"price": 550}).status_code == 200
+    _assert_revalidation(client, catalog, etags, 200)
+
+def test_image_upload_changes_etags(client, catalog):
+    etags = _etags(client, catalog)
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (10, 200, 10)).save(buffer, "PNG")
+    upload = client.post(
+        f"/api/products/{catalog['product_id']}/images", files={"file": ("ring.png", buffer.getvalue(), "image/png")}
+    )
+    assert upload.status_code == 201
+    _assert_revalidation(client, catalog, etags, 200)
+
+def test_category_rename_changes_etags(client, catalog):
+    etags = _etags(client, catalog)
+    tree = client.get("/api/products/categories/tree")
+    renamed = client.put(f"/api/products/categories/{catalog['category_id']}", json={"name": f"Renamed {catalog['category_id']}"})
+    assert renamed.status_code == 200
+    _assert_revalidation(client, catalog, etags, 200)
+    assert client.get("/api/products/categories/tree", headers={"If-None-Match": tree.headers["ETag"]}).status_code == 200
+
+def test_checkout_changes_etags(client, catalog):
+    headers = {"Authorization": f"Bearer {login(client, 'etag-buyer')['access_token']}"}
+    method = client.post("/api/admin/payment-methods", json={"method_name": "Card"}).json()
+    assert client.post("/api/cart/items", json={"product_id": catalog["product_id"], "quantity": 1}, headers=headers).status_code == 201
+    etags = _etags(client, catalog)
+    order = client.post(
+        "/api/orders/", json={"payment_method_id": method["id"], "shipping_address": "1 Main St"}, headers=headers
+    )
+    assert order.status_code == 201
+    _assert_revalidation(client, catalog, etags, 200)
+    assert client.get(_urls(catalog)["detail"]).json()["stock_quantity"] == 4
@@ -0,0 +1,58 @@
+import io
+from PIL import Image
+from cache import invalidate_products
+from database import SessionLocal
+from models.models import Product, ProductImage
+
+def _product(jeweler_id: int) -> int:
+    db = SessionLocal()
+    try:
+        product = Product(name="Variant pendant", price=120, stock_quantity=3, jeweler_id=jeweler_id)
+        db.add(product)
+        db.commit()
+        return product.id
+    finally:
+        db.close()
+
+def _png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 300), (200, 10, 10)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+def test_variant_urls_switch_to_static_files_when_derivatives_finish(client, jeweler_id):
+    product_id = _product(jeweler_id)
+    before = client.get(f"/api/products/{product_id}")
+    upload = client.post(
+        f"/api/products/{product_id}/images", files={"file": ("pendant.png", _png(), "image/png")}
+    )
+    assert upload.status_code == 201
+    image = upload.json()
+    assert image["variants"]["thumb"] == f"/api/products/images/{image['id']}/thumb"
+    assert "derivatives_ready" not in image
+
+    after = client.get(f"/api/products/{product_id}", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    variants = after.json()["images"][0]["variants"]
+    assert variants["thumb"].startswith("/static/products/")
+    assert client.get(variants["thumb"]).status_code == 200
+
+def test_redirect_marks_existing_derivatives_ready(client, jeweler_id):
+    product_id = _product(jeweler_id)
+    image = client.post(
+        f"/api/products/{product_id}/images", files={"file": ("pendant.png", _png(), "image/png")}
+    ).json()
+    db = SessionLocal()
+    try:
+        db.query(ProductImage).filter(ProductImage.id == image["id"]).update({"derivatives_ready": False})
+        db.commit()
+    finally:
+        db.close()
+    invalidate_products([product_id])
+    stale = client.get(f"/api/products/{product_id}")
+    assert stale.json()["images"][0]["variants"]["medium"].startswith("/api/products/images/")
+
+    redirect = client.get(f"/api/products/images/{image['id']}/medium", follow_redirects=False)
+    assert redirect.status_code == 307
+    fresh = client.get(f"/api/products/{product_id}", headers={"If-None-Match": stale.headers["ETag"]})
+    assert fresh.status_code == 200
+    assert fresh.json()["images"][0]["variants"]["medium"] == redirect.headers["location"]
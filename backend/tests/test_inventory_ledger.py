@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+from database import SessionLocal
+from inventory import inventory_ledger, reap_expired, reserve
+from models.models import Product, StockReservation, User
+
+def _setup(jeweler_id: int, username: str) -> tuple:
+    db = SessionLocal()
+    try:
+        user = User(username=username, email=f"{username}@example.com", password="x")
+        product = Product(name=f"Bangle {username}", price=80, stock_quantity=10, jeweler_id=jeweler_id)
+        db.add_all([user, product])
+        db.commit()
+        return user.id, product.id
+    finally:
+        db.close()
+
+def _reserved(product_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return inventory_ledger.snapshot(db, product_id)["reserved"]
+    finally:
+        db.close()
+
+def test_change_committed_around_a_load_is_not_lost(client, jeweler_id):
+    user_id, product_id = _setup(jeweler_id, "ledger-race")
+    writer = SessionLocal()
+    try:
+        inventory_ledger.forget([product_id])
+        writer.add(StockReservation(
+            product_id=product_id, user_id=user_id, quantity=3,
+            expires_at=datetime.utcnow() + timedelta(minutes=5)
+        ))
+        inventory_ledger.adjust(writer, product_id, reserved_delta=3)
+        writer.flush()
+        assert _reserved(product_id) == 0
+        writer.commit()
+    finally:
+        writer.close()
+    assert _reserved(product_id) == 3
+
+def test_expired_holds_are_not_counted_or_released_twice(client, jeweler_id):
+    user_id, product_id = _setup(jeweler_id, "ledger-expired")
+    db = SessionLocal()
+    try:
+        db.add(StockReservation(
+            product_id=product_id, user_id=user_id, quantity=2,
+            expires_at=datetime.utcnow() - timedelta(minutes=1)
+        ))
+        db.commit()
+        inventory_ledger.forget([product_id])
+        assert _reserved(product_id) == 0
+        reap_expired(db)
+        assert _reserved(product_id) == 0
+        db.add(StockReservation(
+            product_id=product_id, user_id=user_id, quantity=2,
+            expires_at=datetime.utcnow() - timedelta(minutes=1)
+        ))
+        db.commit()
+        reserve(db, user_id, {product_id: 4})
+        db.commit()
+    finally:
+        db.close()
+    assert _reserved(product_id) == 4
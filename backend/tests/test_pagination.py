@@ -0,0 +1,17 @@
+import pytest
+from pagination import encode_cursor
+
+@pytest.mark.parametrize("cursor", [
+    "WyJhIl0",
+    encode_cursor([True]),
+    encode_cursor([None]),
+    encode_cursor([1, 2]),
+    "not-a-cursor"
+])
+def test_malformed_cursor_is_rejected(client, cursor):
+    response = client.get("/api/products/", params={"after": cursor})
+    assert response.status_code == 400
+
+def test_valid_cursor_is_accepted(client):
+    response = client.get("/api/products/", params={"after": encode_cursor([0])})
+    assert response.status_code == 200
@@ -0,0 +1,52 @@
+from cache import catalog_cache
+from database import SessionLocal
+from models.models import Category, Product, ProductImage
+from conftest import count_statements
+
+def _add_products(jeweler_id: int, count: int) -> None:
+    db = SessionLocal()
+    try:
+        category = Category(name=f"Rings {count}")
+        db.add(category)
+        for index in range(count):
+            product = Product(
+                name=f"Ring {index}",
+                price=100 + index,
+                stock_quantity=5,
+                jeweler_id=jeweler_id,
+                categories=[category]
+            )
+            product.images = [
+                ProductImage(image_path=f"static/products/{index}-{n}.png", display_order=n) for n in range(2)
+            ]
+            db.add(product)
+        db.commit()
+    finally:
+        db.close()
+
+def _listing_statements(client) -> tuple:
+    with count_statements() as statements:
+        response = client.get("/api/products/?limit=100")
+    assert response.status_code == 200
+    return len(statements), len(response.json())
+
+def _detail_statements(client, product_id: int) -> int:
+    catalog_cache.clear()
+    with count_statements() as statements:
+        response = client.get(f"/api/products/{product_id}")
+    assert response.status_code == 200
+    assert len(response.json()["images"]) == 2
+    return len(statements)
+
+def test_product_listing_statement_count_is_constant(client, jeweler_id):
+    _add_products(jeweler_id, 3)
+    small, small_rows = _listing_statements(client)
+    _add_products(jeweler_id, 40)
+    large, large_rows = _listing_statements(client)
+    assert large_rows > small_rows
+    assert small == large == 4
+
+def test_product_detail_statement_count_is_constant(client, jeweler_id):
+    _add_products(jeweler_id, 1)
+    product_id = client.get("/api/products/?limit=100").json()[-1]["id"]
+    assert _detail_statements(client, product_id) == 3
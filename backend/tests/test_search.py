@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+import pytest
+from search import ProductSearchIndex, product_search_index
+
+def _product(product_id: int, name: str, description: str = "", material: str = "", categories=()) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=product_id, name=name, description=description, material=material, karat=None,
+        categories=[SimpleNamespace(name=c) for c in categories]
+    )
+
+@pytest.fixture
+def index():
+    index = ProductSearchIndex()
+    index.built = True
+    for product in [
+        _product(1, "Sapphire halo ring", "Blue sapphire set in white gold", "White Gold", ["Rings"]),
+        _product(2, "Diamond solitaire", "A classic ring with one sapphire accent", "Platinum", ["Rings"]),
+        _product(3, "Emerald pendant", "Green emerald on a fine chain", "Yellow Gold", ["Necklaces"]),
+        _product(4, "Pearl earrings", "Freshwater pearls", "Silver", ["Earrings"]),
+    ]:
+        index.index_product(product)
+    return index
+
+def _ids(hits):
+    return [product_id for product_id, _ in hits]
+
+def test_name_matches_rank_above_description_matches(index):
+    assert _ids(index.search("sapphire")) == [1, 2]
+
+def test_products_matching_more_terms_rank_first(index):
+    assert _ids(index.search("sapphire ring"))[0] == 1
+
+def test_prefix_expansion(index):
+    assert _ids(index.search("emer")) == [3]
+    assert _ids(index.search("pe")) == [4, 3]
+
+def test_single_edit_typos_match(index):
+    assert _ids(index.search("saphire")) == [1, 2]
+    assert _ids(index.search("emreald")) == [3]
+    assert _ids(index.search("pearrl")) == [4]
+
+def test_two_edits_do_not_match(index):
+    assert index.search("saphre") == []
+
+def test_exact_matches_outrank_fuzzy_ones(index):
+    index.index_product(_product(5, "Pearls", "", "", []))
+    index.index_product(_product(6, "Pears", "", "", []))
+    assert _ids(index.search("pears"))[0] == 6
+
+def test_index_updates_and_removals(index):
+    index.index_product(_product(3, "Ruby pendant", "Red ruby", "Yellow Gold", ["Necklaces"]))
+    assert index.search("emerald") == []
+    assert _ids(index.search("ruby")) == [3]
+    index.remove_product(3)
+    assert index.search("ruby") == []
+    assert len(index) == 3
+
+def test_search_endpoint_follows_product_edits(client, jeweler_id):
+    product_search_index.invalidate()
+    created = client.post("/api/products/", json={
+        "name": "Tourmaline cuff", "price": 410, "stock_quantity": 2, "jeweler_id": jeweler_id,
+        "material": "Silver", "karat": "925", "gemstone_type": "Tourmaline", "gemstone_color": "Pink"
+    })
+    assert created.status_code == 201
+    product_id = created.json()["id"]
+    assert product_id in [p["id"] for p in client.get("/api/products/search", params={"q": "tourmalin"}).json()]
+
+    client.put(f"/api/products/{product_id}", json={"name": "Opal cuff"})
+    assert client.get("/api/products/search", params={"q": "tourmaline"}).json() == []
+    assert [p["id"] for p in client.get("/api/products/search", params={"q": "opal"}).json()] == [product_id]
+
+    client.delete(f"/api/products/{product_id}")
+    assert client.get("/api/products/search", params={"q": "opal"}).json() == []
@@ -0,0 +1,33 @@
+import pytest
+from revocation import revocation_list
+from conftest import login
+
+@pytest.fixture
+def forget_revocations():
+    saved = dict(revocation_list._entries)
+    yield revocation_list._entries.clear
+    revocation_list._entries.update(saved)
+
+def test_refresh_token_is_single_use(client):
+    tokens = login(client, "refresher")
+    first = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert first.status_code == 200
+    replay = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replay.status_code == 401
+
+def test_refresh_replay_is_rejected_by_another_worker(client, forget_revocations):
+    tokens = login(client, "otherworker")
+    assert client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 200
+    forget_revocations()
+    replay = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replay.status_code == 401
+
+def test_logout_revokes_both_tokens(client, forget_revocations):
+    tokens = login(client, "leaver")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    response = client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+    assert response.status_code == 204
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+    forget_revocations()
+    assert client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
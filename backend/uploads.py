@@ -0,0 +1,138 @@
+import hashlib
+import os
+import uuid
+from typing import BinaryIO, Dict, FrozenSet, Optional
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from config import settings
+
+SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+)
+
+EXTENSIONS: Dict[str, str] = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "application/pdf": ".pdf",
+}
+
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+IMAGE_TYPES: FrozenSet[str] = frozenset({"image/png", "image/jpeg", "image/gif", "image/webp"})
+RECEIPT_TYPES: FrozenSet[str] = IMAGE_TYPES | {"application/pdf"}
+
+class StoredUpload:
+    def __init__(self, path: str, sha256: str, size: int, content_type: str, duplicate: bool):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.content_type = content_type
+        self.duplicate = duplicate
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds the {max_bytes} byte upload limit"
+    )
+
+class UploadLimitMiddleware:
+    def __init__(self, app, max_bytes: int = settings.MAX_UPLOAD_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_body_bytes = max_bytes + MULTIPART_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_body_bytes:
+            response = JSONResponse(
+                {"detail": _too_large(self.max_bytes).detail},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                headers={"Connection": "close"}
+            )
+            await response(scope, receive, send)
+            return
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    raise _too_large(self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+def _copy_to_disk(source: BinaryIO, directory: str, allowed_types: FrozenSet[str], max_bytes: int) -> StoredUpload:
+    head = source.read(settings.UPLOAD_CHUNK_BYTES)
+    content_type = sniff_content_type(head)
+    if content_type not in allowed_types:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Unsupported file type"
+        )
+    
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, "wb") as buffer:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                digest.update(chunk)
+                buffer.write(chunk)
+                chunk = source.read(settings.UPLOAD_CHUNK_BYTES)
+        
+        sha256 = digest.hexdigest()
+        final_path = os.path.join(directory, f"{sha256}{EXTENSIONS[content_type]}")
+        duplicate = os.path.exists(final_path)
+        if duplicate:
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, final_path)
+        return StoredUpload(final_path, sha256, size, content_type, duplicate)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+async def store_upload(
+    file: UploadFile,
+    directory: str,
+    allowed_types: FrozenSet[str] = IMAGE_TYPES,
+    max_bytes: int = settings.MAX_UPLOAD_BYTES
+) -> StoredUpload:
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+    try:
+        return await run_in_threadpool(_copy_to_disk, file.file, directory, allowed_types, max_bytes)
+    finally:
+        await file.close()